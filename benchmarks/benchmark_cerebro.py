@@ -0,0 +1,273 @@
+"""
+🧪 BENCHMARK DEL CEREBRO AUTÓNOMO
+Ejecuta el pipeline completo sin la interfaz de Streamlit contra una base de datos temporal:
+procesar_consulta, procesar_lote, procesar_consulta_async, persistencia de BaseDatosCubana
+y snapshot/rollback de SistemaRollback.
+El tiempo por etapa sale de los tramos de cerebro.trazas.
+
+Uso:
+    python benchmarks/benchmark_cerebro.py --consultas 1000 --salida resultados.json
+    python benchmarks/benchmark_cerebro.py --base resultados.json --tolerancia 0.15
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cerebro import BaseDatosCubana, CerebroAutonomo, MOTOR_PALABRAS, SistemaRollback, TRAZADOR
+from cerebro.aprendizaje import _flush_sistemas_activos
+
+RELLENO = (
+    "sistema", "datos", "cuba", "holguín", "proceso", "modelo", "idea", "red", "ciudad",
+    "camino", "tiempo", "valor", "forma", "nivel", "grupo", "fuerza", "pregunta", "respuesta"
+)
+
+INICIOS = ("¿Cómo", "¿Por qué", "¿Qué", "Explica", "Analiza", "Imagina", "Necesito")
+
+# Métricas donde un valor mayor es mejor; en el resto, menor es mejor
+METRICAS_CRECIENTES = (
+    "consultas_por_segundo", "lote_consultas_por_segundo", "async_consultas_por_segundo", "patrones_por_segundo"
+)
+
+def generar_corpus(n, semilla, repeticion):
+    """Consultas sintéticas con vocabulario de todas las especialidades; una fracción se repite"""
+    rng = random.Random(semilla)
+    vocabulario = sorted({
+        palabra for palabras in MOTOR_PALABRAS.vocabularios.values() for palabra in palabras
+    })
+    
+    corpus = []
+    for _ in range(n):
+        if corpus and rng.random() < repeticion:
+            corpus.append(rng.choice(corpus))
+            continue
+        
+        palabras = rng.sample(vocabulario, rng.randint(1, 3)) + rng.sample(RELLENO, rng.randint(2, 6))
+        rng.shuffle(palabras)
+        corpus.append(f"{rng.choice(INICIOS)} {' '.join(palabras)}?")
+    return corpus
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    if not ordenados:
+        return 0.0
+    indice = min(len(ordenados) - 1, max(0, int(round(p / 100 * len(ordenados) + 0.5)) - 1))
+    return ordenados[indice]
+
+def medir_consultas(directorio, corpus, calentamiento):
+    cerebro = CerebroAutonomo(os.path.join(directorio, "latencia.db"))
+    for consulta in corpus[:calentamiento]:
+        cerebro.procesar_consulta(consulta)
+    
+    # Los tramos integrados dan el tiempo por etapa (incluidas las neuronas y el coordinador)
+    TRAZADOR.reiniciar()
+    TRAZADOR.activo = True
+    latencias = []
+    inicio_total = time.perf_counter()
+    try:
+        for consulta in corpus:
+            inicio = time.perf_counter()
+            cerebro.procesar_consulta(consulta)
+            latencias.append(time.perf_counter() - inicio)
+    finally:
+        TRAZADOR.activo = False
+    total = time.perf_counter() - inicio_total
+    
+    n = len(corpus)
+    return cerebro, {
+        "consultas_por_segundo": n / total if total else 0.0,
+        "latencia_media_ms": total / n * 1000,
+        "latencia_p50_ms": percentil(latencias, 50) * 1000,
+        "latencia_p99_ms": percentil(latencias, 99) * 1000,
+        "etapas_ms": {
+            nombre: datos["media_ms"] * datos["conteo"] / n for nombre, datos in TRAZADOR.exportar_json().items()
+        }
+    }
+
+def medir_lote(directorio, corpus, tamano_lote):
+    """Mismo corpus por procesar_lote: un envío por neurona y un flush por lote"""
+    cerebro = CerebroAutonomo(os.path.join(directorio, "lote.db"))
+    inicio = time.perf_counter()
+    for _ in cerebro.procesar_lote(corpus, tamano_lote):
+        pass
+    total = time.perf_counter() - inicio
+    return {"lote_consultas_por_segundo": len(corpus) / total if total else 0.0}
+
+def medir_async(directorio, corpus):
+    """Todo el corpus en vuelo a la vez sobre un único bucle de eventos"""
+    cerebro = CerebroAutonomo(os.path.join(directorio, "async.db"))
+    
+    async def ejecutar():
+        await asyncio.gather(*(cerebro.procesar_consulta_async(consulta) for consulta in corpus))
+        await cerebro.flush_async()
+    
+    inicio = time.perf_counter()
+    asyncio.run(ejecutar())
+    total = time.perf_counter() - inicio
+    return {"async_consultas_por_segundo": len(corpus) / total if total else 0.0}
+
+def medir_memoria(directorio, corpus):
+    """Pasada aparte con tracemalloc: su sobrecoste no contamina las latencias"""
+    cerebro = CerebroAutonomo(os.path.join(directorio, "memoria.db"))
+    cerebro.procesar_consulta(corpus[0])
+    
+    tracemalloc.start()
+    try:
+        base, _ = tracemalloc.get_traced_memory()
+        for consulta in corpus:
+            cerebro.procesar_consulta(consulta)
+        actual, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    
+    return {
+        "memoria_crecimiento_kb": (actual - base) / 1024,
+        "memoria_pico_kb": (pico - base) / 1024
+    }
+
+def medir_persistencia(directorio, n_patrones):
+    base_datos = BaseDatosCubana(os.path.join(directorio, "persistencia.db"))
+    ahora = datetime.now().isoformat()
+    patrones = {
+        f"patron_{i}_{i % 97}_{i % 13}": {"efectividad": (i % 100) / 100, "veces_usado": 1, "ultimo_uso": ahora}
+        for i in range(n_patrones)
+    }
+    
+    inicio = time.perf_counter()
+    base_datos.guardar_patrones(patrones)
+    base_datos.escritor.flush()
+    escritura = time.perf_counter() - inicio
+    
+    claves = list(patrones)
+    inicio = time.perf_counter()
+    for patron in claves[::max(1, len(claves) // 1000)]:
+        base_datos.obtener_patron(patron)
+    lecturas = len(claves[::max(1, len(claves) // 1000)])
+    lectura = time.perf_counter() - inicio
+    
+    return {
+        "patrones_por_segundo": n_patrones / escritura if escritura else 0.0,
+        "busqueda_patron_ms": lectura / lecturas * 1000
+    }
+
+def medir_snapshots(cerebro, corpus, repeticiones):
+    rollback = SistemaRollback(cerebro)
+    snapshots = []
+    
+    for consulta in corpus[:repeticiones]:
+        cerebro.procesar_consulta(consulta)
+        inicio = time.perf_counter()
+        rollback.crear_punto_restauracion()
+        cerebro.base_datos.escritor.flush()
+        snapshots.append(time.perf_counter() - inicio)
+    
+    inicio = time.perf_counter()
+    rollback.ejecutar_rollback()
+    cerebro.base_datos.escritor.flush()
+    duracion_rollback = time.perf_counter() - inicio
+    
+    return {
+        "snapshot_ms": sum(snapshots) / len(snapshots) * 1000 if snapshots else 0.0,
+        "rollback_ms": duracion_rollback * 1000
+    }
+
+def aplanar(metricas, prefijo=""):
+    plano = {}
+    for clave, valor in metricas.items():
+        if isinstance(valor, dict):
+            plano.update(aplanar(valor, f"{prefijo}{clave}."))
+        else:
+            plano[f"{prefijo}{clave}"] = valor
+    return plano
+
+def comparar(actual, base, tolerancia):
+    """Devuelve (metrica, base, actual, cambio relativo, es_regresion) por cada métrica común"""
+    actual, base = aplanar(actual), aplanar(base)
+    filas = []
+    
+    for metrica in sorted(set(actual) & set(base)):
+        anterior, nuevo = base[metrica], actual[metrica]
+        if not anterior:
+            continue
+        cambio = (nuevo - anterior) / anterior
+        creciente = metrica.split(".")[-1] in METRICAS_CRECIENTES
+        regresion = cambio < -tolerancia if creciente else cambio > tolerancia
+        filas.append((metrica, anterior, nuevo, cambio, regresion))
+    return filas
+
+def parsear_argumentos(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark headless del Cerebro Autónomo")
+    parser.add_argument("--consultas", type=int, default=500, help="tamaño del corpus sintético")
+    parser.add_argument("--calentamiento", type=int, default=20, help="consultas previas sin medir")
+    parser.add_argument("--repeticion", type=float, default=0.2, help="fracción de consultas repetidas")
+    parser.add_argument("--semilla", type=int, default=2025)
+    parser.add_argument("--lote", type=int, default=64, help="tamaño de lote para procesar_lote")
+    parser.add_argument("--patrones", type=int, default=10000, help="patrones para la prueba de persistencia")
+    parser.add_argument("--snapshots", type=int, default=10, help="snapshots a crear antes del rollback")
+    parser.add_argument("--sin-memoria", action="store_true", help="omite la pasada con tracemalloc")
+    parser.add_argument("--directorio", help="directorio para las bases de datos (por defecto, uno temporal)")
+    parser.add_argument("--salida", help="archivo JSON donde guardar los resultados")
+    parser.add_argument("--base", help="resultados JSON previos contra los que comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.10, help="cambio relativo tolerado")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parsear_argumentos(argv)
+    corpus = generar_corpus(args.consultas, args.semilla, args.repeticion)
+    calentamiento = generar_corpus(args.calentamiento, args.semilla + 1, 0.0)
+    
+    directorio = args.directorio or tempfile.mkdtemp(prefix="cerebro_bench_")
+    os.makedirs(directorio, exist_ok=True)
+    try:
+        cerebro, metricas = medir_consultas(directorio, calentamiento + corpus, len(calentamiento))
+        metricas.update(medir_lote(directorio, corpus, args.lote))
+        metricas.update(medir_async(directorio, corpus))
+        metricas.update(medir_persistencia(directorio, args.patrones))
+        metricas.update(medir_snapshots(cerebro, corpus, args.snapshots))
+        if not args.sin_memoria:
+            metricas.update(medir_memoria(directorio, corpus))
+    finally:
+        _flush_sistemas_activos()
+        if not args.directorio:
+            shutil.rmtree(directorio, ignore_errors=True)
+    
+    resultado = {
+        "fecha": datetime.now().isoformat(),
+        "python": sys.version.split()[0],
+        "parametros": {k: v for k, v in vars(args).items() if k not in ("salida", "base", "directorio")},
+        "metricas": metricas
+    }
+    
+    for metrica, valor in aplanar(metricas).items():
+        print(f"{metrica:40s} {valor:12.3f}")
+    
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, indent=2, ensure_ascii=False)
+    
+    if not args.base:
+        return 0
+    
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    
+    filas = comparar(metricas, base["metricas"], args.tolerancia)
+    print(f"\nComparación contra {args.base} (tolerancia {args.tolerancia:.0%}):")
+    for metrica, anterior, nuevo, cambio, regresion in filas:
+        marca = "❌ REGRESIÓN" if regresion else "✅"
+        print(f"{metrica:40s} {anterior:12.3f} -> {nuevo:12.3f} ({cambio:+.1%}) {marca}")
+    
+    return 1 if any(fila[4] for fila in filas) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+"""
+🧠 MOTOR DEL CEREBRO AUTÓNOMO CUBANO
+Copyright (c) 2025 Ronald Rodriguez Laguna - Holguín, Cuba
+
+Importable sin Streamlit y sin efectos al importar: los submódulos se cargan
+la primera vez que se usa uno de sus nombres.
+"""
+
+import importlib
+
+_EXPORTACIONES = {
+    "CerebroAutonomo": "nucleo",
+    "TAMANO_LOTE": "nucleo",
+    "BaseDatosCubana": "persistencia",
+    "PoolConexiones": "persistencia",
+    "EscritorDiferido": "persistencia",
+    "PatronesPerezosos": "persistencia",
+    "PATRONES_POR_PAGINA": "persistencia",
+    "PoliticaRetencion": "persistencia",
+    "obtener_pool": "persistencia",
+    "SistemaRollback": "rollback",
+    "ProcesadorParalelo": "paralelo",
+    "EjecutorCompartido": "paralelo",
+    "obtener_ejecutor_compartido": "paralelo",
+    "SistemaAutoaprendizaje": "aprendizaje",
+    "IndicePatrones": "aprendizaje",
+    "MotorPalabrasClave": "palabras_clave",
+    "MOTOR_PALABRAS": "palabras_clave",
+    "ConsultaProcesada": "palabras_clave",
+    "calcular_relevancia": "palabras_clave",
+    "NeuronaAutoaprendizaje": "neuronas",
+    "RegistroNeuronas": "neuronas",
+    "registrar_especialidad": "neuronas",
+    "GeneradorMetas": "metas",
+    "HistorialCircular": "historial",
+    "CacheRespuestas": "cache",
+    "normalizar_consulta": "cache",
+    "exportar_ndjson": "intercambio",
+    "importar_ndjson": "intercambio",
+    "TRAZADOR": "trazas",
+    "trazado": "trazas",
+}
+
+__all__ = list(_EXPORTACIONES)
+
+def __getattr__(nombre):
+    modulo = _EXPORTACIONES.get(nombre)
+    if modulo is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+    
+    valor = getattr(importlib.import_module(f".{modulo}", __name__), nombre)
+    globals()[nombre] = valor
+    return valor
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,353 @@
+"""Aprendizaje de patrones con flush por lotes e índice invertido de términos"""
+
+import time
+import heapq
+import threading
+import atexit
+import weakref
+from datetime import datetime
+
+from .persistencia import PatronesPerezosos
+from .palabras_clave import ConsultaProcesada
+from .trazas import trazado
+
+# ===== SISTEMA DE AUTOAPRENDIZAJE MEJORADO =====
+_SISTEMAS_ACTIVOS = weakref.WeakSet()
+
+@atexit.register
+def _flush_sistemas_activos():
+    """Garantiza que ningún patrón pendiente se pierda al apagar el proceso"""
+    for sistema in list(_SISTEMAS_ACTIVOS):
+        try:
+            sistema.flush()
+            sistema.base_datos.escritor.flush(timeout=30)
+        except Exception:
+            pass
+
+PALABRAS_VACIAS = frozenset((
+    "el", "la", "los", "las", "un", "una", "de", "del", "al", "y", "o", "a",
+    "en", "con", "por", "para", "se", "lo", "es", "que", "su", "sus"
+))
+SIGNOS_BORDE = "¿?¡!.,;:\"'()"
+MARGEN_CANDIDATOS = 4  # Candidatos por término = k * MARGEN_CANDIDATOS + 1
+
+def terminos_indexables(tokens):
+    return {t for t in (token.strip(SIGNOS_BORDE) for token in tokens) if t and t not in PALABRAS_VACIAS}
+
+def tokens_de_patron(patron):
+    """Términos indexables de la clave de un patrón (sus primeras palabras unidas con "_")"""
+    return terminos_indexables(patron.split("_"))
+
+def filas_indice_de(patrones):
+    """Entradas (token, patron, efectividad, veces_usado) de indice_patrones para {patron: datos}"""
+    return [
+        (token, patron, datos["efectividad"], datos["veces_usado"])
+        for patron, datos in patrones.items() for token in tokens_de_patron(patron)
+    ]
+
+class IndicePatrones:
+    """Índice invertido en memoria para los patrones nuevos aún no persistidos;
+    el resto se consulta en la tabla indice_patrones"""
+    def __init__(self, entradas=()):
+        self._postings = {}
+        self._lock = threading.Lock()  # El escritor diferido descarta entradas desde su hilo
+        for token, patron in entradas:
+            self._postings.setdefault(token, set()).add(patron)
+    
+    def __len__(self):
+        return len(self._postings)
+    
+    def agregar(self, patron):
+        tokens = tokens_de_patron(patron)
+        with self._lock:
+            for token in tokens:
+                self._postings.setdefault(token, set()).add(patron)
+        return tokens
+    
+    def descartar(self, patrones):
+        with self._lock:
+            for patron in patrones:
+                for token in tokens_de_patron(patron):
+                    postings = self._postings.get(token)
+                    if postings is not None:
+                        postings.discard(patron)
+                        if not postings:
+                            del self._postings[token]
+    
+    def candidatos(self, terminos):
+        """Patrones que comparten algún término, con el número de términos compartidos"""
+        conteo = {}
+        with self._lock:
+            for termino in terminos:
+                for patron in self._postings.get(termino, ()):
+                    conteo[patron] = conteo.get(patron, 0) + 1
+        return conteo
+
+class SistemaAutoaprendizaje:
+    def __init__(self, base_datos, max_pendientes=50, intervalo_flush_ms=2000):
+        self.base_datos = base_datos
+        self.conocimiento = self.base_datos.cargar_conocimiento()
+        self.indice = IndicePatrones()
+        self._patrones_nuevos = set()
+        self.max_pendientes = max_pendientes
+        self.intervalo_flush_ms = intervalo_flush_ms
+        self._patrones_sucios = set()
+        self._actualizaciones_pendientes = 0
+        self._ultimo_flush = time.monotonic()
+        self._temporizador = None  # Flush programado mientras haya patrones sucios sin encolar
+        self._lock_flush = threading.Lock()
+        self.lock = threading.RLock()  # Protege las mutaciones de self.conocimiento
+        self._cambios_snapshot = set()  # None = cambios desconocidos, el próximo snapshot es completo
+        _SISTEMAS_ACTIVOS.add(self)
+        
+        if self.base_datos.indice_patrones_vacio():
+            # Base de datos anterior al índice: se construye y persiste una única vez
+            self.base_datos.reconstruir_indice_patrones(tokens_de_patron)
+    
+    @trazado("aprendizaje.restaurar_diferencias")
+    def restaurar_diferencias(self, conocimiento, candidatos=None):
+        """Lleva los patrones al estado de conocimiento escribiendo sólo las filas que difieren,
+        en una transacción. candidatos: claves que pueden diferir (None = comparar la tabla
+        entera en streaming). Devuelve (actualizados, eliminados)"""
+        objetivo = conocimiento["patrones_aprendidos"]
+        
+        with self.lock:
+            # Con lo pendiente ya en disco la tabla es el estado actual completo
+            self.flush()
+            self.base_datos.escritor.flush()
+            with self._lock_flush:
+                cambios_previos = self._cambios_snapshot
+            
+            if candidatos is not None and cambios_previos is not None:
+                claves = set(candidatos) | cambios_previos
+                actuales = self.base_datos.obtener_patrones(claves)
+                cambios = {p: objetivo[p] for p in claves if p in objetivo and objetivo[p] != actuales.get(p)}
+                eliminados = [p for p in claves if p not in objetivo and p in actuales]
+            else:
+                cambios, eliminados, vistos = {}, [], set()
+                for patron, datos in self.base_datos.iterar_patrones():
+                    vistos.add(patron)
+                    if patron not in objetivo:
+                        eliminados.append(patron)
+                    elif objetivo[patron] != datos:
+                        cambios[patron] = objetivo[patron]
+                cambios.update((p, datos) for p, datos in objetivo.items() if p not in vistos)
+            
+            if cambios or eliminados:
+                self.base_datos.aplicar_diferencias_patrones(
+                    cambios, eliminados, filas_indice_de(cambios),
+                    [(token, patron) for patron in eliminados for token in tokens_de_patron(patron)]
+                )
+                self.base_datos.escritor.flush()
+            
+            for clave, valor in conocimiento.items():
+                if clave != "patrones_aprendidos":
+                    self.conocimiento[clave] = valor
+            # El conjunto caliente se descarta: lo restaurado se vuelve a leer de la tabla
+            self.conocimiento["patrones_aprendidos"] = PatronesPerezosos(self.base_datos)
+            
+            # El próximo snapshot es un delta contra el último: incluye también lo restaurado
+            with self._lock_flush:
+                if self._cambios_snapshot is not None and cambios_previos is not None:
+                    self._cambios_snapshot |= set(cambios) | set(eliminados) | cambios_previos
+                else:
+                    self._cambios_snapshot = None
+        
+        return len(cambios), len(eliminados)
+    
+    def listar_patrones(self, despues_de="", limite=20):
+        """Paginación por cursor para la UI; los valores en memoria prevalecen sobre la tabla"""
+        patrones = self.conocimiento["patrones_aprendidos"]
+        pagina = self.base_datos.listar_patrones(despues_de, limite)
+        return [(patron, dict(patrones.en_memoria(patron) or datos)) for patron, datos in pagina]
+    
+    @trazado("aprendizaje.flush")
+    def flush(self):
+        """Upsert de los patrones sucios desde el último flush"""
+        with self._lock_flush:
+            sucios = self._patrones_sucios
+            nuevos = self._patrones_nuevos
+            self._patrones_sucios = set()
+            self._patrones_nuevos = set()
+            self._actualizaciones_pendientes = 0
+            self._ultimo_flush = time.monotonic()
+            if self._temporizador is not None:
+                self._temporizador.cancel()
+                self._temporizador = None
+        
+        if not sucios:
+            return 0
+        
+        patrones = self.conocimiento["patrones_aprendidos"]
+        lote = {patron: datos for patron, datos in ((p, patrones.get(p)) for p in sucios) if datos is not None}
+        # El índice invertido (con la efectividad que lo ordena) se persiste en la misma transacción
+        filas_indice = filas_indice_de(lote)
+        
+        try:
+            # Las entradas del índice en memoria se descartan a medida que el escritor confirma
+            # cada patrón; las de un patrón que espera reintento siguen sirviendo la búsqueda
+            self.base_datos.guardar_patrones(
+                lote, filas_indice, lambda confirmados: self.indice.descartar(nuevos & confirmados)
+            )
+        except Exception:
+            with self._lock_flush:
+                self._patrones_sucios |= sucios
+                self._patrones_nuevos |= nuevos
+                self._programar_flush()
+            raise
+        
+        # Encolados: el escritor los sirve hasta confirmarlos, así que dejan de estar fijados
+        # salvo que se hayan vuelto a modificar entretanto
+        with self.lock, self._lock_flush:
+            patrones.liberar([p for p in lote if p not in self._patrones_sucios])
+        return len(lote)
+    
+    def consumir_cambios_snapshot(self):
+        """Patrones modificados desde el último snapshot (None si se desconocen)"""
+        with self._lock_flush:
+            cambios = self._cambios_snapshot
+            self._cambios_snapshot = set()
+        return cambios
+    
+    def invalidar_cambios_snapshot(self):
+        """Los cambios consumidos por un snapshot que no llegó a disco se pierden: el próximo es completo"""
+        with self._lock_flush:
+            self._cambios_snapshot = None
+    
+    def _marcar_sucio(self, patron, nuevo=False):
+        with self._lock_flush:
+            self._patrones_sucios.add(patron)
+            if nuevo:
+                self._patrones_nuevos.add(patron)
+            if self._cambios_snapshot is not None:
+                self._cambios_snapshot.add(patron)
+            self._actualizaciones_pendientes += 1
+            self._programar_flush()
+            transcurrido_ms = (time.monotonic() - self._ultimo_flush) * 1000
+            return (
+                self._actualizaciones_pendientes >= self.max_pendientes
+                or transcurrido_ms >= self.intervalo_flush_ms
+            )
+    
+    def _programar_flush(self):
+        """Con _lock_flush tomado: un cerebro inactivo también vuelca lo sucio tras el intervalo"""
+        if self._temporizador is None:
+            self._temporizador = threading.Timer(self.intervalo_flush_ms / 1000, self._flush_programado)
+            self._temporizador.daemon = True
+            self._temporizador.start()
+    
+    def _flush_programado(self):
+        with self._lock_flush:
+            self._temporizador = None
+        try:
+            self.flush()
+        except Exception:
+            pass  # flush deja los patrones sucios y programa el reintento
+    
+    @trazado("aprendizaje.aprender")
+    def aprender_de_experiencia(self, consulta, resultados, efectividad, contexto=None):
+        patron = ConsultaProcesada.desde(contexto or consulta).patron
+        
+        with self.lock:
+            patrones = self.conocimiento["patrones_aprendidos"]
+            # Se fija antes de leerlo para que no pueda desalojarse mientras se modifica
+            patrones.fijar(patron)
+            datos = patrones.get(patron)
+            nuevo = datos is None
+            if nuevo:
+                patrones[patron] = {
+                    "efectividad": efectividad,
+                    "veces_usado": 1,
+                    "ultimo_uso": datetime.now().isoformat()
+                }
+                self.indice.agregar(patron)
+            else:
+                datos["veces_usado"] += 1
+                datos["efectividad"] = (datos["efectividad"] + efectividad) / 2
+            
+            self.conocimiento["evoluciones"] += 1
+            toca_flush = self._marcar_sucio(patron, nuevo)
+        
+        if toca_flush:
+            self.flush()
+    
+    @trazado("aprendizaje.aprender_lote")
+    def aprender_de_lote(self, experiencias):
+        """Una única actualización para un lote de (consulta, resultados, efectividad, contexto):
+        por patrón se pliegan en orden las mismas medias que aprender_de_experiencia y se hace
+        un solo flush, así el lote entero se confirma en una transacción"""
+        por_patron = {}
+        total = 0
+        for consulta, _, efectividad, contexto in experiencias:
+            por_patron.setdefault(ConsultaProcesada.desde(contexto or consulta).patron, []).append(efectividad)
+            total += 1
+        
+        if not total:
+            return 0
+        
+        ahora = datetime.now().isoformat()
+        with self.lock:
+            patrones = self.conocimiento["patrones_aprendidos"]
+            for patron, efectividades in por_patron.items():
+                patrones.fijar(patron)
+                datos = patrones.get(patron)
+                nuevo = datos is None
+                if nuevo:
+                    datos = patrones[patron] = {
+                        "efectividad": efectividades[0],
+                        "veces_usado": 1,
+                        "ultimo_uso": ahora
+                    }
+                    self.indice.agregar(patron)
+                    efectividades = efectividades[1:]
+                
+                efectividad = datos["efectividad"]
+                for valor in efectividades:
+                    efectividad = (efectividad + valor) / 2
+                datos["efectividad"] = efectividad
+                datos["veces_usado"] += len(efectividades)
+                self._marcar_sucio(patron, nuevo)
+            
+            self.conocimiento["evoluciones"] += total
+        
+        self.flush()
+        return len(por_patron)
+    
+    def obtener_patrones_relacionados(self, consulta, k=3):
+        """Top-k patrones más efectivos que comparten términos con la consulta; el top global
+        está dentro de la unión de los tops por término, así cada término aporta pocas filas"""
+        consulta = ConsultaProcesada.desde(consulta)
+        terminos = terminos_indexables(consulta.tokens)
+        if not terminos:
+            return []
+        
+        # Margen para la propia consulta y para valores en memoria más recientes que la tabla
+        candidatos = self.base_datos.buscar_candidatos(terminos, k * MARGEN_CANDIDATOS + 1)
+        
+        with self.lock:
+            patrones = self.conocimiento["patrones_aprendidos"]
+            # Los patrones aún no persistidos sólo están en el índice en memoria
+            for patron, compartidos in self.indice.candidatos(terminos).items():
+                candidatos.setdefault(patron, (compartidos, None))
+            
+            actuales = {}
+            for patron, (compartidos, datos) in candidatos.items():
+                datos = patrones.en_memoria(patron) or datos
+                if datos is not None and patron != consulta.patron:
+                    actuales[patron] = (compartidos, dict(datos))
+        
+        mejores = heapq.nlargest(k, (
+            (datos["efectividad"], compartidos, datos["veces_usado"], patron)
+            for patron, (compartidos, datos) in actuales.items()
+        ))
+        return [(patron, actuales[patron][1]) for _, _, _, patron in mejores]
+    
+    @trazado("aprendizaje.recomendacion")
+    def obtener_recomendacion(self, consulta, k=3):
+        relacionados = self.obtener_patrones_relacionados(consulta, k)
+        if not relacionados:
+            return "Patrón nuevo: el sistema aprenderá de esta consulta"
+        
+        return "Patrones relacionados más efectivos: " + ", ".join(
+            f"{patron.replace('_', ' ')} ({datos['efectividad']:.2f})" for patron, datos in relacionados
+        )
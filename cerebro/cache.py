@@ -0,0 +1,68 @@
+"""Caché LRU con TTL para respuestas completas"""
+
+import time
+import os
+import threading
+from collections import OrderedDict
+
+# ===== CACHÉ DE RESPUESTAS =====
+CAPACIDAD_CACHE = int(os.environ.get("CEREBRO_CACHE_CAPACIDAD", "512"))
+TTL_CACHE_SEGUNDOS = float(os.environ.get("CEREBRO_CACHE_TTL", "300"))
+
+def normalizar_consulta(consulta):
+    """Minúsculas, espacios colapsados y sin signos en los bordes: "¿Qué es la IA?" == "que es la ia" salvo tildes"""
+    return " ".join(consulta.lower().split()).strip("¿?¡!.,;: ")
+
+class CacheRespuestas:
+    """LRU con TTL, thread-safe, delante de CerebroAutonomo.procesar_consulta"""
+    def __init__(self, capacidad=CAPACIDAD_CACHE, ttl_segundos=TTL_CACHE_SEGUNDOS):
+        self.capacidad = capacidad
+        self.ttl_segundos = ttl_segundos
+        self._entradas = OrderedDict()  # clave -> (expira_en, experiencia)
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.expulsiones = 0
+        self.invalidaciones = 0
+    
+    def obtener(self, clave):
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                self.fallos += 1
+                return None
+            
+            if entrada[0] < time.monotonic():
+                del self._entradas[clave]
+                self.fallos += 1
+                return None
+            
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+            return entrada[1]
+    
+    def guardar(self, clave, valor):
+        with self._lock:
+            self._entradas[clave] = (time.monotonic() + self.ttl_segundos, valor)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.capacidad:
+                self._entradas.popitem(last=False)
+                self.expulsiones += 1
+    
+    def invalidar(self):
+        with self._lock:
+            self._entradas.clear()
+            self.invalidaciones += 1
+    
+    def estadisticas(self):
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                "entradas": len(self._entradas),
+                "capacidad": self.capacidad,
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "tasa_aciertos": self.aciertos / consultas if consultas else 0.0,
+                "expulsiones": self.expulsiones,
+                "invalidaciones": self.invalidaciones
+            }
@@ -0,0 +1,107 @@
+"""Historial circular columnar con medias móviles"""
+
+import json
+import os
+import sys
+import threading
+from array import array
+
+from .aprendizaje import _SISTEMAS_ACTIVOS
+from .trazas import trazado
+
+# ===== HISTORIAL CIRCULAR =====
+CAPACIDAD_HISTORIAL = int(os.environ.get("CEREBRO_HISTORIAL_CAPACIDAD", "1000"))
+
+class HistorialCircular:
+    """Historial de capacidad fija guardado por columnas, con agregados móviles O(1) por inserción"""
+    def __init__(self, capacidad=CAPACIDAD_HISTORIAL, ventanas=(5,), base_datos=None, lote_derrame=32):
+        self.capacidad = capacidad
+        self._efectividades = array("d", bytes(8 * capacidad))
+        self._timestamps = array("d", bytes(8 * capacidad))
+        self._consultas = [None] * capacidad
+        self._siguiente = 0
+        self.total = 0  # Inserciones desde el arranque, incluidas las ya expulsadas
+        self._sumas = {ventana: 0.0 for ventana in ventanas if ventana <= capacidad}
+        self._lock = threading.Lock()
+        # Derrame opcional de las experiencias completas a SQLite
+        self.base_datos = base_datos
+        self.lote_derrame = lote_derrame
+        self._pendientes_derrame = []
+        if base_datos is not None:
+            _SISTEMAS_ACTIVOS.add(self)
+    
+    @trazado("historial.append")
+    def append(self, experiencia):
+        efectividad = experiencia["efectividad"]
+        
+        with self._lock:
+            i = self._siguiente
+            
+            for ventana in self._sumas:
+                self._sumas[ventana] += efectividad
+                if self.total >= ventana:
+                    self._sumas[ventana] -= self._efectividades[(i - ventana) % self.capacidad]
+            
+            self._efectividades[i] = efectividad
+            self._timestamps[i] = experiencia["timestamp"]
+            self._consultas[i] = sys.intern(experiencia["consulta"])
+            self.total += 1
+            self._siguiente = (i + 1) % self.capacidad
+            
+            if self._siguiente == 0:
+                self._recalcular_sumas()
+        
+        if self.base_datos is not None:
+            self._derramar(experiencia)
+    
+    def _recalcular_sumas(self):
+        # Una vez por vuelta se recalculan exactas para no acumular error de redondeo
+        for ventana in self._sumas:
+            self._sumas[ventana] = sum(self._efectividades[-ventana:])
+    
+    def _derramar(self, experiencia):
+        fila = (
+            experiencia["timestamp"], experiencia["consulta"], experiencia["efectividad"],
+            json.dumps(experiencia["resultados"], ensure_ascii=False, default=str)
+        )
+        with self._lock:
+            self._pendientes_derrame.append(fila)
+            if len(self._pendientes_derrame) < self.lote_derrame:
+                return
+        self.flush()
+    
+    def flush(self):
+        with self._lock:
+            filas, self._pendientes_derrame = self._pendientes_derrame, []
+        if filas:
+            self.base_datos.guardar_historial(filas)
+    
+    def media_movil(self, ventana=5):
+        """Efectividad media de las últimas `ventana` consultas (una de las ventanas configuradas)"""
+        with self._lock:
+            n = min(self.total, ventana)
+            return self._sumas[ventana] / n if n else 0.5
+    
+    def __len__(self):
+        return min(self.total, self.capacidad)
+    
+    def _entrada(self, k):
+        i = (self._siguiente - len(self) + k) % self.capacidad
+        return {
+            "timestamp": self._timestamps[i],
+            "consulta": self._consultas[i],
+            "efectividad": self._efectividades[i]
+        }
+    
+    def __getitem__(self, indice):
+        with self._lock:
+            if isinstance(indice, slice):
+                return [self._entrada(k) for k in range(*indice.indices(len(self)))]
+            if indice < 0:
+                indice += len(self)
+            if not 0 <= indice < len(self):
+                raise IndexError("índice fuera del historial")
+            return self._entrada(indice)
+    
+    def __iter__(self):
+        return iter(self[:])
@@ -0,0 +1,314 @@
+"""
+Exportación e importación en streaming de patrones, metas y snapshots en NDJSON
+(comprimido con gzip si el archivo termina en .gz).
+
+Uso:
+    python -m cerebro.intercambio exportar cerebro_autonomo.db conocimiento.ndjson.gz
+    python -m cerebro.intercambio importar nuevo.db conocimiento.ndjson.gz --bloque 20000
+
+La primera línea es una cabecera con las columnas de cada tabla, cada fila es un array
+[tabla, valores...] y la última línea lleva los conteos para detectar archivos truncados.
+
+Limitación conocida: la importación ronda los 30-40 s por millón de patrones (unas cinco
+entradas de índice invertido por patrón). Casi todo es construir indice_patrones e
+idx_indice_patrones_ranking en SQLite, que ya se hace con un único INSERT ... SELECT ordenado
+y sin índices secundarios; bajar de ahí exige menos entradas de índice por patrón.
+"""
+
+import argparse
+import base64
+import gzip
+import json
+import sys
+from contextlib import nullcontext
+from datetime import datetime
+from itertools import islice
+
+from .persistencia import (
+    BaseDatosCubana, INDICES_SECUNDARIOS, SQL_UPSERT_PATRON, SQL_INSERTAR_SECCION, SQL_METAS_REGISTRADAS
+)
+from .aprendizaje import tokens_de_patron
+from .trazas import trazado
+
+# ===== FORMATO DE INTERCAMBIO =====
+FORMATO_INTERCAMBIO = "cerebro-ndjson"
+VERSION_INTERCAMBIO = 1
+BLOQUE_IMPORTACION = 10000
+NIVEL_GZIP = 6
+
+COLUMNAS_INTERCAMBIO = {
+    "conocimiento": ("patron", "efectividad", "veces_usado", "ultimo_uso", "tipo"),
+    "metas": ("meta", "tipo", "prioridad", "progreso", "estado", "creada_en", "completada_en"),
+    "snapshot_secciones": ("hash", "base", "profundidad", "datos"),
+    "snapshots": ("id", "timestamp", "hash_integridad", "datos", "efectividad_previa", "estable"),
+    "snapshot_indice": ("clave", "snapshot_id"),
+}
+
+# El índice invertido no se exporta: se reconstruye desde las claves al importar
+GRUPOS_INTERCAMBIO = {
+    "patrones": ("conocimiento",),
+    "metas": ("metas",),
+    "snapshots": ("snapshot_secciones", "snapshots", "snapshot_indice"),
+}
+
+SQL_IMPORTAR_META = '''
+    INSERT INTO metas (meta, tipo, prioridad, progreso, estado, creada_en, completada_en)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+'''
+
+SQL_IMPORTAR_SNAPSHOT = '''
+    INSERT INTO snapshots (id, timestamp, hash_integridad, datos, efectividad_previa, estable)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+
+SQL_IMPORTAR_INDICE_SNAPSHOT = "INSERT OR IGNORE INTO snapshot_indice (clave, snapshot_id) VALUES (?, ?)"
+
+# Los términos de cada patrón llegan como un array JSON por fila: el índice invertido se
+# expande y ordena en SQLite al final, en vez de insertar millones de filas sueltas en su clave
+SQL_CREAR_CARGA_INDICE = '''
+    CREATE TEMP TABLE carga_indice (tokens TEXT, patron TEXT, efectividad REAL, veces_usado INTEGER)
+'''
+
+SQL_IMPORTAR_CARGA_INDICE = "INSERT INTO carga_indice (tokens, patron, efectividad, veces_usado) VALUES (?, ?, ?, ?)"
+
+SQL_CONSTRUIR_INDICE_PATRONES = '''
+    INSERT INTO indice_patrones (token, patron, efectividad, veces_usado)
+    SELECT t.value, c.patron, c.efectividad, c.veces_usado
+    FROM carga_indice c, json_each(c.tokens) t
+    WHERE true
+    ORDER BY t.value, c.patron, c.rowid
+    ON CONFLICT(token, patron) DO UPDATE SET
+        efectividad = excluded.efectividad,
+        veces_usado = excluded.veces_usado
+'''
+
+SQL_BORRAR_CARGA_INDICE = "DROP TABLE temp.carga_indice"
+
+class ErrorIntercambio(ValueError):
+    pass
+
+def _abrir(ruta, modo):
+    """"-" es la entrada/salida estándar; .gz se comprime en streaming"""
+    if ruta == "-":
+        return nullcontext(sys.stdout if modo == "w" else sys.stdin)
+    if ruta.endswith(".gz"):
+        return gzip.open(ruta, modo + "t", encoding="utf-8", compresslevel=NIVEL_GZIP)
+    return open(ruta, modo, encoding="utf-8")
+
+def _linea(valor):
+    return json.dumps(valor, separators=(",", ":"), ensure_ascii=False) + "\n"
+
+def _filas(entrada, bloque):
+    """Decodifica las líneas de bloque en bloque con un único json.loads por bloque"""
+    for lineas in iter(lambda: list(islice(entrada, bloque)), []):
+        yield from json.loads("[" + ",".join(linea for linea in lineas if not linea.isspace()) + "]")
+
+def _terminos_json(patron):
+    """Array JSON con los términos indexables del patrón para carga_indice"""
+    terminos = tokens_de_patron(patron)
+    # Sin comillas, barras ni caracteres de control basta con unir; el resto pasa por json.dumps
+    if '"' in patron or "\\" in patron or not patron.isprintable():
+        return json.dumps(list(terminos))
+    return '["' + '","'.join(terminos) + '"]' if terminos else "[]"
+
+def _tablas(grupos):
+    desconocidos = set(grupos) - set(GRUPOS_INTERCAMBIO)
+    if desconocidos:
+        raise ErrorIntercambio(f"Grupos desconocidos: {', '.join(sorted(desconocidos))}")
+    return [tabla for grupo in GRUPOS_INTERCAMBIO if grupo in grupos for tabla in GRUPOS_INTERCAMBIO[grupo]]
+
+# ===== EXPORTACIÓN =====
+@trazado("intercambio.exportar")
+def exportar_ndjson(base_datos, destino, grupos=tuple(GRUPOS_INTERCAMBIO)):
+    """Vuelca las tablas fila a fila, sin materializarlas, desde una única lectura consistente"""
+    tablas = _tablas(grupos)
+    conteos = dict.fromkeys(tablas, 0)
+    base_datos.escritor.flush()
+    
+    with _abrir(destino, "w") as salida, base_datos.pool.lectura() as conn:
+        salida.write(_linea({
+            "formato": FORMATO_INTERCAMBIO,
+            "version": VERSION_INTERCAMBIO,
+            "exportado_en": datetime.now().isoformat(),
+            "columnas": {tabla: COLUMNAS_INTERCAMBIO[tabla] for tabla in tablas}
+        }))
+        
+        # En WAL una transacción de lectura ve el mismo estado en todas las tablas
+        conn.execute("BEGIN")
+        try:
+            for tabla in tablas:
+                columnas = COLUMNAS_INTERCAMBIO[tabla]
+                cursor = conn.execute(f"SELECT {', '.join(columnas)} FROM {tabla}")
+                if tabla == "snapshot_secciones":
+                    filas = (
+                        (hash_seccion, base, profundidad, base64.b64encode(datos).decode("ascii"))
+                        for hash_seccion, base, profundidad, datos in cursor
+                    )
+                else:
+                    filas = cursor
+                
+                for fila in filas:
+                    salida.write(_linea([tabla, *fila]))
+                    conteos[tabla] += 1
+        finally:
+            conn.execute("COMMIT")
+        
+        salida.write(_linea({"conteos": conteos}))
+    
+    return conteos
+
+# ===== IMPORTACIÓN =====
+SQL_IMPORTACION = {
+    "conocimiento": SQL_UPSERT_PATRON,
+    "carga_indice": SQL_IMPORTAR_CARGA_INDICE,
+    "metas": SQL_IMPORTAR_META,
+    "snapshot_secciones": SQL_INSERTAR_SECCION,
+    "snapshots": SQL_IMPORTAR_SNAPSHOT,
+    "snapshot_indice": SQL_IMPORTAR_INDICE_SNAPSHOT,
+}
+
+class _Importacion:
+    """Acumula filas por tabla y las vuelca con executemany en bloques dentro de la transacción"""
+    def __init__(self, conn, bloque):
+        self.conn = conn
+        self.bloque = bloque
+        self.leidas = {}
+        self.conteos = {}
+        self.pendientes = {tabla: [] for tabla in SQL_IMPORTACION}
+        self.desplazamiento_snapshots = conn.execute("SELECT COALESCE(MAX(id), 0) FROM snapshots").fetchone()[0]
+        self.metas_existentes = {fila[0] for fila in conn.execute(SQL_METAS_REGISTRADAS)}
+    
+    def agregar(self, tabla, valores):
+        if tabla not in COLUMNAS_INTERCAMBIO:
+            raise ErrorIntercambio(f"Tabla desconocida en la importación: {tabla}")
+        self.leidas[tabla] = self.leidas.get(tabla, 0) + 1
+        
+        if tabla == "conocimiento":
+            patron, efectividad, veces_usado, ultimo_uso, tipo = valores
+            fila = (patron, efectividad, veces_usado, ultimo_uso, tipo or "patron")
+            # Mismos términos que en línea; el índice invertido se construye al final
+            self.pendientes["carga_indice"].append((_terminos_json(patron), patron, efectividad, veces_usado))
+        elif tabla == "metas":
+            # Las metas que ya existen en el destino conservan su progreso
+            if valores[0] in self.metas_existentes:
+                return
+            fila = valores
+        elif tabla == "snapshot_secciones":
+            hash_seccion, base, profundidad, datos = valores
+            fila = (hash_seccion, base, profundidad, base64.b64decode(datos))
+        elif tabla == "snapshots":
+            fila = (valores[0] + self.desplazamiento_snapshots, *valores[1:])
+        else:
+            clave, snapshot_id = valores
+            fila = (clave, snapshot_id + self.desplazamiento_snapshots)
+        
+        filas = self.pendientes[tabla]
+        filas.append(fila)
+        self.conteos[tabla] = self.conteos.get(tabla, 0) + 1
+        if len(filas) >= self.bloque:
+            self.volcar()
+    
+    def volcar(self):
+        for tabla, filas in self.pendientes.items():
+            if filas:
+                self.conn.executemany(SQL_IMPORTACION[tabla], filas)
+                filas.clear()
+    
+    def construir_indice(self):
+        """Vuelca indice_patrones ordenado por su clave; un patrón repetido conserva su última fila"""
+        self.conn.execute(SQL_CONSTRUIR_INDICE_PATRONES)
+        self.conn.execute(SQL_BORRAR_CARGA_INDICE)
+
+@trazado("intercambio.importar")
+def importar_ndjson(base_datos, origen, bloque=BLOQUE_IMPORTACION):
+    """Carga todo en una sola transacción con los índices secundarios eliminados y
+    synchronous=OFF; si el archivo está truncado o es inválido no se aplica nada.
+    Pensado para sembrar una base de datos antes de arrancar el cerebro sobre ella"""
+    base_datos.escritor.flush()
+    
+    with _abrir(origen, "r") as entrada:
+        try:
+            cabecera = json.loads(next(entrada))
+        except StopIteration:
+            raise ErrorIntercambio("Archivo de intercambio vacío") from None
+        if cabecera.get("formato") != FORMATO_INTERCAMBIO or cabecera.get("version") != VERSION_INTERCAMBIO:
+            raise ErrorIntercambio(f"Formato no soportado: {cabecera.get('formato')} v{cabecera.get('version')}")
+        
+        with base_datos.pool.carga_masiva() as conn:
+            for nombre, _ in INDICES_SECUNDARIOS:
+                conn.execute(f"DROP INDEX IF EXISTS {nombre}")
+            
+            conn.execute(SQL_CREAR_CARGA_INDICE)
+            importacion = _Importacion(conn, bloque)
+            pie = None
+            for fila in _filas(entrada, bloque):
+                if isinstance(fila, dict):
+                    pie = fila
+                    break
+                importacion.agregar(fila[0], fila[1:])
+            importacion.volcar()
+            
+            if pie is None:
+                raise ErrorIntercambio("Archivo truncado: falta la línea final con los conteos")
+            esperadas = {tabla: n for tabla, n in pie["conteos"].items() if n}
+            if importacion.leidas != esperadas:
+                raise ErrorIntercambio(f"Filas leídas distintas a las exportadas: {importacion.leidas} != {esperadas}")
+            
+            importacion.construir_indice()
+            for _, sql in INDICES_SECUNDARIOS:
+                conn.execute(sql)
+    
+    # Con synchronous=OFF el commit no se sincronizó: el checkpoint lo lleva a disco
+    with base_datos.pool.lectura() as conn:
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    
+    return importacion.conteos
+
+# ===== LÍNEA DE COMANDOS =====
+def parsear_argumentos(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m cerebro.intercambio",
+        description="Exporta o importa patrones, metas y snapshots en NDJSON (gzip si termina en .gz)"
+    )
+    ordenes = parser.add_subparsers(dest="orden", required=True)
+    
+    exportar = ordenes.add_parser("exportar", help="vuelca la base de datos a un archivo")
+    exportar.add_argument("base_datos")
+    exportar.add_argument("archivo", help='destino; "-" para la salida estándar')
+    exportar.add_argument(
+        "--solo", nargs="+", choices=tuple(GRUPOS_INTERCAMBIO), default=tuple(GRUPOS_INTERCAMBIO),
+        help="grupos a exportar (por defecto, todos)"
+    )
+    
+    importar = ordenes.add_parser(
+        "importar", help="carga un archivo exportado en la base de datos",
+        description=(
+            "Carga un archivo exportado en una sola transacción. Limitación conocida: unos 30-40 s "
+            "por millón de patrones, dominados por la construcción del índice invertido en SQLite"
+        )
+    )
+    importar.add_argument("base_datos")
+    importar.add_argument("archivo", help='origen; "-" para la entrada estándar')
+    importar.add_argument("--bloque", type=int, default=BLOQUE_IMPORTACION, help="filas por executemany")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parsear_argumentos(argv)
+    base_datos = BaseDatosCubana(args.base_datos)
+    
+    try:
+        if args.orden == "exportar":
+            conteos = exportar_ndjson(base_datos, args.archivo, args.solo)
+        else:
+            conteos = importar_ndjson(base_datos, args.archivo, args.bloque)
+    except (ValueError, OSError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    
+    # Con "-" la salida estándar lleva los datos: el resumen va a stderr
+    for tabla, n in conteos.items():
+        print(f"{tabla:20s} {n:12d}", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+"""Generación y evaluación incremental de metas"""
+
+import time
+import threading
+from datetime import datetime
+
+from .palabras_clave import PATRONES_METAS
+from .aprendizaje import _SISTEMAS_ACTIVOS
+from .trazas import trazado
+
+# ===== HITO 1.2: GENERADOR DE METAS AUTÓNOMO =====
+METAS_BASE = (
+    "optimizar_procesamiento",
+    "incrementar_efectividad_global",
+    "expandir_capacidades_analiticas"
+)
+PROGRESO_POR_CONSULTA_META = 0.1
+LOTE_METAS = 20  # Consultas entre escrituras del progreso de metas
+
+class GeneradorMetas:
+    """Etapa incremental tras cada consulta: sólo mira la consulta actual y contadores O(1);
+    el progreso que cambia se escribe por lotes en la tabla metas"""
+    def __init__(self, cerebro, lote_escritura=LOTE_METAS):
+        self.cerebro = cerebro
+        self.base_datos = cerebro.base_datos
+        self.lote_escritura = lote_escritura
+        self.metas_actuales = []
+        self.metas_logradas = []
+        self.historial_metas = []
+        self.progreso = {}
+        self.contadores = dict.fromkeys(PATRONES_METAS, 0)
+        self._cambios = {}  # meta -> (progreso, estado, completada_en) pendiente de escribir
+        self._consultas_sin_escribir = 0
+        self.lock = threading.Lock()
+        self._cargar_metas()
+        _SISTEMAS_ACTIVOS.add(self)
+    
+    def _cargar_metas(self):
+        registradas = self.base_datos.obtener_metas_registradas()
+        for meta in METAS_BASE:
+            if meta not in registradas:
+                self.base_datos.guardar_meta(meta, "base")
+        
+        # obtener_metas_activas espera al escritor, así que ya incluye las metas recién sembradas
+        for datos in self.base_datos.obtener_metas_activas():
+            meta = datos["meta"]
+            if meta in self.progreso:
+                continue
+            self.metas_actuales.append(meta)
+            self.progreso[meta] = datos["progreso"]
+            if meta in self.contadores:
+                # Los contadores se reconstruyen a partir del progreso persistido
+                self.contadores[meta] = round(datos["progreso"] / PROGRESO_POR_CONSULTA_META)
+        
+        self.metas_logradas = [m for m in registradas if m not in self.progreso]
+    
+    def analizar_patrones_consulta(self, contexto):
+        """Metas cuyo vocabulario aparece en la consulta actual (ya calculado al procesarla)"""
+        return [meta for meta in PATRONES_METAS if contexto.coincidencias.tiene(f"meta:{meta}")]
+    
+    def generar_metas_emergentes(self, detectadas):
+        metas_agregadas = []
+        
+        for meta in detectadas:
+            if meta not in self.progreso and meta not in self.metas_logradas:
+                self.metas_actuales.append(meta)
+                self.progreso[meta] = 0.0
+                metas_agregadas.append(meta)
+                self.historial_metas.append({
+                    "timestamp": time.time(),
+                    "tipo": "meta_emergente",
+                    "meta": meta,
+                    "origen": "analisis_patrones"
+                })
+                self.base_datos.guardar_meta(meta, "emergente")
+                
+        return metas_agregadas
+    
+    def evaluar_progreso_metas(self):
+        progreso = {}
+        
+        for meta in self.metas_actuales:
+            if meta == "optimizar_procesamiento":
+                progreso[meta] = self.cerebro.registro.eficiencia_media()
+                
+            elif meta == "incrementar_efectividad_global":
+                progreso[meta] = self.cerebro.historial.media_movil(5)
+            
+            elif meta == "expandir_capacidades_analiticas":
+                progreso[meta] = min(1.0, self.cerebro.registro.experiencia_total() * 0.001)
+            
+            elif meta == "mejorar_metodos_aprendizaje":
+                progreso[meta] = min(1.0, self.cerebro.sistema_aprendizaje.conocimiento["evoluciones"] * 0.05)
+                
+            else:
+                progreso[meta] = min(1.0, self.contadores.get(meta, 0) * PROGRESO_POR_CONSULTA_META)
+                
+        return {meta: round(valor, 3) for meta, valor in progreso.items()}
+    
+    @trazado("metas.actualizar")
+    def actualizar(self, contexto):
+        """Actualiza contadores y progreso con la consulta recién procesada"""
+        with self.lock:
+            detectadas = self.analizar_patrones_consulta(contexto)
+            for meta in detectadas:
+                self.contadores[meta] += 1
+            self.generar_metas_emergentes(detectadas)
+            
+            for meta, valor in self.evaluar_progreso_metas().items():
+                if valor == self.progreso.get(meta):
+                    continue
+                self.progreso[meta] = valor
+                
+                if valor >= 1.0:
+                    self.metas_actuales.remove(meta)
+                    self.metas_logradas.append(meta)
+                    del self.progreso[meta]
+                    self._cambios[meta] = (valor, "completada", datetime.now().isoformat())
+                else:
+                    self._cambios[meta] = (valor, "activa", None)
+            
+            self._consultas_sin_escribir += 1
+            toca_escribir = self._consultas_sin_escribir >= self.lote_escritura
+        
+        if toca_escribir:
+            self.flush()
+    
+    def flush(self):
+        with self.lock:
+            cambios, self._cambios = self._cambios, {}
+            self._consultas_sin_escribir = 0
+        
+        if cambios:
+            self.base_datos.actualizar_metas([
+                (progreso, estado, completada_en, meta)
+                for meta, (progreso, estado, completada_en) in cambios.items()
+            ])
+        return len(cambios)
+    
+    def resumen(self):
+        with self.lock:
+            return dict(self.progreso)
@@ -0,0 +1,376 @@
+"""Neuronas con autoaprendizaje, registro columnar y manejadores por especialidad"""
+
+import time
+import random
+import sys
+import operator
+import threading
+from array import array
+from collections import deque
+from itertools import islice, repeat
+
+from .palabras_clave import (
+    ConsultaProcesada, GRUPOS_TEMAS, GRUPOS_RECURSOS, RECURSOS_POR_DEFECTO, CONCEPTOS_CONOCIMIENTO,
+    TOTAL_PALABRAS_CURIOSIDAD, TOTAL_PALABRAS_INTERES, METODOLOGIAS, BASES_IDEAS, CAPACIDADES_IDEAS
+)
+from .trazas import trazado
+
+# ===== NEURONA CON CAPACIDAD DE AUTOAPRENDIZAJE =====
+ENERGIA_MAXIMA = 100.0
+COSTE_ENERGIA = 1.5  # Energía que gasta una neurona por consulta procesada
+
+# ===== REGISTRO DE ESPECIALIDADES =====
+MANEJADORES_ESPECIALIDAD = {}
+
+def registrar_especialidad(especialidad, manejador=None):
+    """Registra manejador(neurona, consulta, confianza) -> dict para una especialidad.
+    Se puede usar como decorador; las neuronas creadas después ya lo resuelven"""
+    def registrar(funcion):
+        MANEJADORES_ESPECIALIDAD[sys.intern(especialidad)] = funcion
+        return funcion
+    
+    if manejador is not None:
+        return registrar(manejador)
+    return registrar
+
+class RegistroNeuronas:
+    """Estado numérico de toda la población en arrays contiguos; cada neurona es una vista"""
+    def __init__(self):
+        self.eficiencia = array("d")
+        self.experiencia = array("q")
+        self.nivel_energia = array("d")
+        self.umbral_activacion = array("d")
+        # Serializa toda escritura de columnas con las operaciones en bloque; las neuronas lo
+        # mantienen durante sus lectura-modificación-escritura para que ninguna pise a la otra
+        self.lock = threading.RLock()
+    
+    def __len__(self):
+        return len(self.eficiencia)
+    
+    def reservar(self, eficiencia, experiencia, nivel_energia, umbral_activacion):
+        with self.lock:
+            self.eficiencia.append(eficiencia)
+            self.experiencia.append(experiencia)
+            self.nivel_energia.append(nivel_energia)
+            self.umbral_activacion.append(umbral_activacion)
+            return len(self.eficiencia) - 1
+    
+    # Operaciones en bloque: map() sobre builtins recorre el array sin bytecode por elemento
+    def incrementar_eficiencia(self, incremento, maximo=0.95):
+        with self.lock:
+            self.eficiencia[:] = array("d", map(
+                min, map(operator.add, self.eficiencia, repeat(incremento)), repeat(maximo)
+            ))
+    
+    def recargar_energia(self, incremento, maximo=ENERGIA_MAXIMA):
+        with self.lock:
+            self.nivel_energia[:] = array("d", map(
+                min, map(operator.add, self.nivel_energia, repeat(incremento)), repeat(maximo)
+            ))
+    
+    def contar_con_energia(self):
+        return sum(map(operator.gt, self.nivel_energia, repeat(0.0)))
+    
+    def experiencia_total(self):
+        return sum(self.experiencia)
+    
+    def eficiencia_media(self):
+        return sum(self.eficiencia) / len(self.eficiencia) if self.eficiencia else 0.0
+
+def _columna(nombre):
+    """Propiedad que lee y escribe la columna del registro en la posición de la neurona"""
+    def leer(self):
+        return getattr(self._registro, nombre)[self._indice]
+    
+    def escribir(self, valor):
+        with self._registro.lock:
+            getattr(self._registro, nombre)[self._indice] = valor
+    
+    return property(leer, escribir)
+
+class NeuronaAutoaprendizaje:
+    __slots__ = (
+        "_registro", "_indice", "nombre", "especialidad", "estado",
+        "historial", "habilidades_aprendidas", "_lock", "_manejador"
+    )
+    origen = "Holguín, Cuba 2025"
+    
+    eficiencia = _columna("eficiencia")
+    experiencia = _columna("experiencia")
+    nivel_energia = _columna("nivel_energia")
+    umbral_activacion = _columna("umbral_activacion")
+    
+    def __init__(self, nombre, especialidad, registro=None):
+        self._registro = registro if registro is not None else RegistroNeuronas()
+        self._indice = self._registro.reservar(
+            0.6,  # Eficiencia inicial aumentada para mejor rendimiento
+            0,
+            ENERGIA_MAXIMA,
+            random.uniform(0.2, 0.6)
+        )
+        self.nombre = nombre
+        self.especialidad = sys.intern(especialidad)
+        self.estado = "activa"
+        self.historial = deque(maxlen=20)  # (timestamp, confianza, efectivo)
+        self.habilidades_aprendidas = []
+        self._lock = threading.RLock()
+        # La especialidad se resuelve una sola vez; las desconocidas usan el procesamiento base
+        self._manejador = MANEJADORES_ESPECIALIDAD.get(
+            self.especialidad, NeuronaAutoaprendizaje._procesamiento_base
+        )
+    
+    @property
+    def id(self):
+        return f"{self._indice:08x}"
+    
+    def exportar_estado(self):
+        """Estado mutable compacto y picklable para procesar la neurona en otro proceso"""
+        with self._lock:
+            return (
+                self.nombre, self.especialidad, self.nivel_energia, self.experiencia,
+                self.eficiencia, self.umbral_activacion, tuple(self.habilidades_aprendidas),
+                # reevaluar_estrategias sólo mira la tasa de éxito de las últimas entradas
+                tuple(h[2] for h in islice(reversed(self.historial), 11))[::-1]
+            )
+    
+    @classmethod
+    def desde_estado(cls, estado):
+        nombre, especialidad, energia, experiencia, eficiencia, umbral, habilidades, efectivos = estado
+        neurona = cls(nombre, especialidad)
+        neurona.nivel_energia = energia
+        neurona.experiencia = experiencia
+        neurona.eficiencia = eficiencia
+        neurona.umbral_activacion = umbral
+        neurona.historial.extend((0.0, 0.0, efectivo) for efectivo in efectivos)
+        neurona.habilidades_aprendidas = list(habilidades)
+        return neurona
+    
+    def delta_desde(self, estado):
+        """Cambios respecto a un estado exportado, listos para fusionar en el proceso padre"""
+        _, _, energia, experiencia, eficiencia, _, habilidades, _ = estado
+        return (
+            self.nivel_energia - energia,
+            self.experiencia - experiencia,
+            self.eficiencia - eficiencia,
+            self.umbral_activacion,
+            tuple(h for h in self.habilidades_aprendidas if h not in habilidades),
+            # Las entradas importadas llevan timestamp 0: así el delta es correcto aunque el deque rote
+            [h for h in self.historial if h[0]]
+        )
+    
+    def aplicar_delta(self, delta):
+        d_energia, d_experiencia, d_eficiencia, umbral, habilidades, entradas = delta
+        with self._lock, self._registro.lock:
+            self.nivel_energia += d_energia
+            self.experiencia += d_experiencia
+            self.eficiencia = max(0.1, min(0.95, self.eficiencia + d_eficiencia))
+            self.umbral_activacion = umbral
+            
+            for habilidad in habilidades:
+                if habilidad not in self.habilidades_aprendidas:
+                    self.habilidades_aprendidas.append(habilidad)
+            
+            self.historial.extend(entradas)
+        
+    def desarrollar(self):
+        with self._registro.lock:
+            if self.experiencia > 10 and self.estado == "activa":
+                mejora = min(0.95, self.eficiencia + 0.15)
+                if mejora > self.eficiencia:
+                    self.eficiencia = mejora
+                    nueva_habilidad = f"Habilidad nivel {int(self.experiencia/10)}"
+                    if nueva_habilidad not in self.habilidades_aprendidas:
+                        self.habilidades_aprendidas.append(nueva_habilidad)
+                    return f"🎯 {self.nombre} desarrolló {nueva_habilidad}"
+        return None
+
+    def aprender_de_resultado(self, efectivo):
+        with self._lock, self._registro.lock:
+            if efectivo:
+                self.experiencia += 2
+                self.eficiencia = min(0.95, self.eficiencia + 0.02)
+            else:
+                self.experiencia += 1
+                self.eficiencia = max(0.1, self.eficiencia - 0.01)
+            
+            if self.experiencia % 5 == 0:
+                self.reevaluar_estrategias()
+
+    def reevaluar_estrategias(self):
+        if len(self.historial) > 10:
+            exitos = sum(1 for h in islice(reversed(self.historial), 10) if h[2])
+            tasa_exito = exitos / 10
+            
+            with self._registro.lock:
+                if tasa_exito > 0.7:
+                    self.umbral_activacion = max(0.1, self.umbral_activacion - 0.05)
+                elif tasa_exito < 0.3:
+                    self.umbral_activacion = min(0.9, self.umbral_activacion + 0.05)
+
+    @trazado("neurona.procesar")
+    def procesar(self, entrada, contexto=None):
+        # Con el cerebro compartido varias sesiones pueden usar la misma neurona a la vez
+        with self._lock:
+            with self._registro.lock:
+                if self.nivel_energia <= 0:
+                    return {"error": f"{self.nombre} sin energía"}
+                
+                self.nivel_energia -= COSTE_ENERGIA
+                self.experiencia += 1
+            
+            resultado = self._procesamiento_inteligente(entrada, contexto)
+            desarrollo = self.desarrollar()
+            
+            if desarrollo:
+                resultado["desarrollo"] = desarrollo
+            
+            # ✅ CORRECCIÓN CRÍTICA: Limitar confianza entre 0.0 y 1.0
+            if "confianza" in resultado:
+                resultado["confianza"] = max(0.0, min(1.0, resultado["confianza"]))
+            
+            confianza = resultado.get("confianza", 0)
+            self.historial.append((time.time(), confianza, confianza > 0.5))
+            
+            return resultado
+
+    def _procesamiento_inteligente(self, entrada, contexto):
+        # El cerebro tokeniza una sola vez y pasa la ConsultaProcesada como contexto
+        consulta = ConsultaProcesada.desde(
+            contexto if isinstance(contexto, ConsultaProcesada) else entrada
+        )
+        
+        if self.experiencia > 5:
+            confianza_base = self.eficiencia * (1 + (self.experiencia / 100))
+        else:
+            confianza_base = self.eficiencia
+        
+        # ✅ Asegurar confianza base esté en rango válido
+        confianza_base = max(0.0, min(1.0, confianza_base))
+        
+        return self._manejador(self, consulta, confianza_base)
+
+    def _analisis_adaptativo(self, consulta, confianza):
+        temas = self._detectar_temas_mejorado(consulta)
+        
+        return {
+            "tipo": "analisis_adaptativo",
+            "temas_detectados": temas,
+            "complejidad": self._calcular_complejidad(consulta),
+            "confianza": confianza,
+            "experiencia_neurona": self.experiencia,
+            "origen": self.origen
+        }
+
+    def _detectar_temas_mejorado(self, consulta):
+        temas = [tema for tema, grupo in GRUPOS_TEMAS if consulta.coincidencias.tiene(grupo)]
+        return temas if temas else ["general"]
+
+    def _calcular_complejidad(self, consulta):
+        palabras = consulta.num_tokens
+        return "alta" if palabras > 50 else "media" if palabras > 20 else "baja"
+
+    def _razonamiento_evolutivo(self, consulta, confianza):
+        return {
+            "tipo": "razonamiento_evolutivo",
+            "metodologia": "cientifica" if consulta.coincidencias.tiene("metodo:cientifica") else "sistemica",
+            "pasos": METODOLOGIAS["cientifica"],
+            "confianza": confianza * 0.9,
+            "nivel_razonamiento": "avanzado" if self.experiencia > 10 else "básico",
+            "origen": self.origen
+        }
+
+    def _conexiones_inteligentes(self, consulta, confianza):
+        conexiones = []
+        for dominio, concepto, grupo in CONCEPTOS_CONOCIMIENTO:
+            if consulta.coincidencias.tiene(grupo):
+                conexiones.append({
+                    "dominio": dominio,
+                    "concepto": concepto,
+                    "relevancia": random.uniform(0.6, 0.95)
+                })
+        
+        return {
+            "tipo": "conexiones_inteligentes",
+            "conexiones": conexiones[:2],
+            "confianza": confianza * 0.85,
+            "origen": self.origen
+        }
+
+    def _generacion_adaptativa(self, consulta, confianza):
+        ideas = [
+            f"Sistema de aprendizaje autónomo basado en {random.choice(BASES_IDEAS)}",
+            f"Arquitectura neuronal que {random.choice(CAPACIDADES_IDEAS)}"
+        ]
+        
+        return {
+            "tipo": "creatividad_adaptativa",
+            "ideas": ideas,
+            "confianza": confianza * 0.8,
+            "origen": self.origen
+        }
+
+    def _procesamiento_empatico(self, consulta, confianza):
+        emociones = {
+            "curiosidad": self._calcular_curiosidad(consulta),
+            "interes": self._calcular_interes(consulta)
+        }
+        
+        return {
+            "tipo": "procesamiento_empatico",
+            "emocion_principal": max(emociones, key=emociones.get),
+            "intensidad": max(emociones.values()),
+            "confianza": confianza * 0.75,
+            "origen": self.origen
+        }
+
+    def _gestion_inteligente(self, consulta, confianza):
+        recursos = self._evaluar_recursos_inteligentes(consulta)
+        
+        return {
+            "tipo": "gestion_inteligente",
+            "recursos_recomendados": recursos,
+            "confianza": confianza * 0.9,
+            "estrategia": "optimizada" if self.experiencia > 5 else "base",
+            "origen": self.origen
+        }
+
+    def _procesamiento_autonomo(self, consulta, confianza):
+        return {
+            "tipo": "procesamiento_autonomo",
+            "analisis_aprendizaje": f"Neurona con {self.experiencia} experiencias",
+            "habilidades_desarrolladas": self.habilidades_aprendidas,
+            "confianza": confianza,
+            "origen": self.origen
+        }
+
+    def _procesamiento_base(self, consulta, confianza):
+        return {
+            "tipo": "procesamiento_base",
+            "resultado": f"Procesado por {self.nombre} (exp: {self.experiencia})",
+            "confianza": confianza,
+            "origen": self.origen
+        }
+
+    def _evaluar_recursos_inteligentes(self, consulta):
+        recursos = [
+            especialidad for especialidad, grupo in GRUPOS_RECURSOS
+            if consulta.coincidencias.tiene(grupo)
+        ]
+        return recursos if recursos else list(RECURSOS_POR_DEFECTO)
+
+    def _calcular_curiosidad(self, consulta):
+        return consulta.coincidencias.conteo("emocion:curiosidad") / TOTAL_PALABRAS_CURIOSIDAD
+
+    def _calcular_interes(self, consulta):
+        return consulta.coincidencias.conteo("emocion:interes") / TOTAL_PALABRAS_INTERES
+
+for _especialidad, _manejador in (
+    ("percepcion_avanzada", NeuronaAutoaprendizaje._analisis_adaptativo),
+    ("logica_estructurada", NeuronaAutoaprendizaje._razonamiento_evolutivo),
+    ("memoria_asociativa", NeuronaAutoaprendizaje._conexiones_inteligentes),
+    ("creatividad_emergente", NeuronaAutoaprendizaje._generacion_adaptativa),
+    ("inteligencia_emocional", NeuronaAutoaprendizaje._procesamiento_empatico),
+    ("coordinacion_central", NeuronaAutoaprendizaje._gestion_inteligente),
+    ("autoaprendizaje", NeuronaAutoaprendizaje._procesamiento_autonomo)
+):
+    registrar_especialidad(_especialidad, _manejador)
@@ -0,0 +1,327 @@
+"""CerebroAutonomo: orquesta neuronas, aprendizaje, metas, historial y caché"""
+
+import os
+import time
+import threading
+from itertools import islice
+
+from .persistencia import BaseDatosCubana
+from .paralelo import ProcesadorParalelo, obtener_ejecutor_compartido
+from .aprendizaje import SistemaAutoaprendizaje
+from .palabras_clave import ConsultaProcesada, calcular_relevancia
+from .neuronas import NeuronaAutoaprendizaje, RegistroNeuronas
+from .metas import GeneradorMetas
+from .historial import HistorialCircular
+from .cache import CacheRespuestas, normalizar_consulta
+from .trazas import trazado
+
+# ===== CEREBRO AUTÓNOMO MEJORADO =====
+TAMANO_LOTE = int(os.environ.get("CEREBRO_TAMANO_LOTE", "64"))
+# Energía que recupera cada neurona por segundo: bajo carga se agota y en reposo se repone
+RECARGA_ENERGIA_POR_SEGUNDO = float(os.environ.get("CEREBRO_RECARGA_ENERGIA", "0.5"))
+
+class CerebroAutonomo:
+    def __init__(self, archivo_db="cerebro_autonomo.db"):
+        self.registro = RegistroNeuronas()
+        self.neuronas = [
+            NeuronaAutoaprendizaje(nombre, especialidad, self.registro)
+            for nombre, especialidad in (
+                ("PERCEPCIÓN ADAPTATIVA", "percepcion_avanzada"),
+                ("LÓGICA EVOLUTIVA", "logica_estructurada"),
+                ("MEMORIA INTELIGENTE", "memoria_asociativa"),
+                ("CREATIVIDAD ADAPTATIVA", "creatividad_emergente"),
+                ("INTELIGENCIA EMPÁTICA", "inteligencia_emocional"),
+                ("GESTIÓN INTELIGENTE", "coordinacion_central"),
+                ("NÚCLEO AUTOAPRENDIZAJE", "autoaprendizaje")
+            )
+        ]
+        self.coordinador = next(
+            (n for n in self.neuronas if n.especialidad == "coordinacion_central"), None
+        )
+        self.base_datos = BaseDatosCubana(archivo_db)
+        self.sistema_aprendizaje = SistemaAutoaprendizaje(self.base_datos)
+        self.historial = HistorialCircular()
+        self.energia_sistema = 1000
+        self.evoluciones = 0
+        self._ultima_recarga = time.monotonic()
+        self.procesador = ProcesadorParalelo()
+        self.cache_respuestas = CacheRespuestas()
+        self.version_estado = 0  # Cambia cuando una evolución o un rollback alteran el cerebro
+        self.lock_estado = threading.RLock()  # Energía, evoluciones y versión del cerebro compartido
+        self.autor = "Ronald Rodriguez Laguna"
+        self.ubicacion = "Holguín, Cuba 2025"
+        self.generador_metas = GeneradorMetas(self)
+
+    @trazado("cerebro.procesar_consulta")
+    def procesar_consulta(self, consulta, al_resultado=None):
+        """al_resultado(resultado) se llama con cada resultado de neurona en cuanto está listo"""
+        if al_resultado is not None:
+            for tipo, dato in self.procesar_consulta_stream(consulta):
+                if tipo == "resultado":
+                    al_resultado(dato)
+            return dato
+        
+        clave_cache = (normalizar_consulta(consulta), self.version_estado)
+        en_cache = self.cache_respuestas.obtener(clave_cache)
+        if en_cache is not None:
+            return self._registrar_desde_cache(en_cache)
+        
+        contexto, resultados, seleccionadas, omitidas = self._preparar_consulta(consulta)
+        resultados.extend(self.procesador.procesar_neuronas_paralelo(seleccionadas, consulta, contexto))
+        return self._completar_consulta(clave_cache, consulta, contexto, resultados, omitidas)
+    
+    def procesar_consulta_stream(self, consulta):
+        """Generador: ("resultado", resultado) por neurona según termina, empezando por el
+        coordinador, y al final ("experiencia", experiencia) con el resumen agregado.
+        La consulta sólo se aprende si el generador se consume hasta el final"""
+        clave_cache = (normalizar_consulta(consulta), self.version_estado)
+        en_cache = self.cache_respuestas.obtener(clave_cache)
+        if en_cache is not None:
+            experiencia = self._registrar_desde_cache(en_cache)
+            for resultado in experiencia["resultados"]:
+                yield "resultado", resultado
+            yield "experiencia", experiencia
+            return
+        
+        contexto, resultados, seleccionadas, omitidas = self._preparar_consulta(consulta)
+        for resultado in resultados:
+            yield "resultado", resultado
+        
+        # La experiencia conserva el orden de enrutado, no el de llegada
+        por_posicion = [None] * len(seleccionadas)
+        for indice, resultado in self.procesador.iterar_neuronas_paralelo(seleccionadas, consulta, contexto):
+            por_posicion[indice] = resultado
+            yield "resultado", resultado
+        
+        resultados.extend(por_posicion)
+        yield "experiencia", self._completar_consulta(clave_cache, consulta, contexto, resultados, omitidas)
+    
+    def _completar_consulta(self, clave_cache, consulta, contexto, resultados, omitidas):
+        efectividad = self._evaluar_efectividad(resultados)
+        
+        self.sistema_aprendizaje.aprender_de_experiencia(consulta, resultados, efectividad, contexto)
+        
+        experiencia = self._registrar_experiencia(consulta, contexto, resultados, omitidas, efectividad)
+        self._actualizar_sistema()
+        self.cache_respuestas.guardar(clave_cache, experiencia)
+        
+        return experiencia
+    
+    async def procesar_consulta_async(self, consulta):
+        """Corrutina para servidores asyncio: las fases bloqueantes (coordinador, aprendizaje y
+        SQLite) van al pool de hilos compartido y las neuronas se esperan con gather, así miles
+        de consultas en vuelo comparten un único bucle y un número fijo de hilos"""
+        clave_cache = (normalizar_consulta(consulta), self.version_estado)
+        en_cache = self.cache_respuestas.obtener(clave_cache)
+        if en_cache is not None:
+            return self._registrar_desde_cache(en_cache)
+        
+        # En modo procesos las neuronas van al pool de procesos; las fases siempre a hilos
+        hilos = obtener_ejecutor_compartido()
+        contexto, resultados, seleccionadas, omitidas = await hilos.ejecutar_async(
+            self._preparar_consulta, consulta
+        )
+        resultados.extend(await self.procesador.procesar_neuronas_async(seleccionadas, consulta, contexto))
+        return await hilos.ejecutar_async(
+            self._completar_consulta, clave_cache, consulta, contexto, resultados, omitidas
+        )
+    
+    def flush(self, timeout=None):
+        """Encola aprendizaje y metas pendientes y espera a que el escritor los confirme"""
+        self._flush_estado()
+        return self.base_datos.escritor.flush(timeout)
+    
+    async def flush_async(self, timeout=None):
+        """Encola aprendizaje y metas pendientes y espera su confirmación sin bloquear el bucle"""
+        await obtener_ejecutor_compartido().ejecutar_async(self._flush_estado)
+        return await self.base_datos.escritor.flush_async(timeout)
+    
+    def _flush_estado(self):
+        self.sistema_aprendizaje.flush()
+        self.generador_metas.flush()
+    
+    def procesar_lote(self, consultas, tamano_lote=TAMANO_LOTE):
+        """Generador para trabajos masivos: consume cualquier iterable por lotes y devuelve
+        las experiencias en el orden de entrada, con memoria acotada al tamaño del lote"""
+        consultas = iter(consultas)
+        while True:
+            lote = list(islice(consultas, tamano_lote))
+            if not lote:
+                return
+            yield from self._procesar_lote(lote)
+    
+    @trazado("cerebro.procesar_lote")
+    def _procesar_lote(self, lote):
+        """Un envío por neurona, una actualización de aprendizaje y un flush por lote"""
+        claves = [(normalizar_consulta(consulta), self.version_estado) for consulta in lote]
+        en_cache = [self.cache_respuestas.obtener(clave) for clave in claves]
+        
+        # Las consultas repetidas dentro del lote se procesan una vez y las demás salen como caché
+        primeras = {}
+        for indice, clave in enumerate(claves):
+            if en_cache[indice] is None:
+                primeras.setdefault(clave, indice)
+        
+        preparadas = {indice: self._preparar_consulta(lote[indice]) for indice in primeras.values()}
+        salidas = self.procesador.procesar_lote_paralelo([
+            (seleccionadas, lote[indice], contexto)
+            for indice, (contexto, _, seleccionadas, _) in preparadas.items()
+        ])
+        
+        evaluadas = {}
+        for (indice, (contexto, resultados, _, omitidas)), salida in zip(preparadas.items(), salidas):
+            resultados.extend(salida)
+            evaluadas[indice] = (contexto, resultados, omitidas, self._evaluar_efectividad(resultados))
+        
+        self.sistema_aprendizaje.aprender_de_lote(
+            (lote[indice], resultados, efectividad, contexto)
+            for indice, (contexto, resultados, _, efectividad) in evaluadas.items()
+        )
+        
+        experiencias = []
+        for indice, consulta in enumerate(lote):
+            if indice in evaluadas:
+                experiencia = self._registrar_experiencia(consulta, *evaluadas[indice])
+                self.cache_respuestas.guardar(claves[indice], experiencia)
+            else:
+                anterior = en_cache[indice] or experiencias[primeras[claves[indice]]]
+                experiencia = self._registrar_desde_cache(anterior)
+            experiencias.append(experiencia)
+        
+        self._actualizar_sistema(len(evaluadas))
+        self.generador_metas.flush()
+        return experiencias
+    
+    def _registrar_desde_cache(self, en_cache):
+        experiencia = dict(en_cache, timestamp=time.time(), desde_cache=True)
+        self.historial.append(experiencia)
+        self.generador_metas.actualizar(experiencia["contexto"])
+        return experiencia
+    
+    def _preparar_consulta(self, consulta):
+        """Contexto, resultado del coordinador y neuronas enrutadas para una consulta nueva"""
+        contexto = ConsultaProcesada(consulta)
+        
+        # El coordinador decide primero qué recursos hacen falta
+        resultados = []
+        recomendadas = ()
+        if self.coordinador is not None:
+            coordinacion = self.coordinador.procesar(consulta, contexto)
+            recomendadas = coordinacion.get("recursos_recomendados", ())
+            resultados.append(coordinacion)
+        
+        seleccionadas, omitidas = self._enrutar_neuronas(contexto, recomendadas)
+        return contexto, resultados, seleccionadas, omitidas
+    
+    def _registrar_experiencia(self, consulta, contexto, resultados, omitidas, efectividad):
+        experiencia = {
+            "timestamp": time.time(),
+            "consulta": consulta,
+            "contexto": contexto,
+            "resultados": resultados,
+            "omitidas": omitidas,
+            "efectividad": efectividad,
+            "resumen": self._crear_resumen_inteligente(resultados, efectividad, contexto)
+        }
+        
+        self.historial.append(experiencia)
+        self.generador_metas.actualizar(contexto)
+        return experiencia
+    
+    @trazado("cerebro.enrutar")
+    def _enrutar_neuronas(self, contexto, recomendadas):
+        """Sólo se ejecutan las neuronas cuya relevancia alcanza su umbral de activación"""
+        relevancias = {}
+        umbrales = self.registro.umbral_activacion
+        energias = self.registro.nivel_energia
+        seleccionadas = []
+        omitidas = []
+        
+        for neurona in self.neuronas:
+            if neurona is self.coordinador:
+                continue
+            
+            especialidad = neurona.especialidad
+            if especialidad not in relevancias:
+                relevancias[especialidad] = calcular_relevancia(especialidad, contexto, recomendadas)
+            relevancia = relevancias[especialidad]
+            umbral = umbrales[neurona._indice]
+            
+            if energias[neurona._indice] <= 0:
+                razon = "sin energía"
+            elif relevancia < umbral:
+                razon = f"relevancia {relevancia:.2f} < umbral {umbral:.2f}"
+            else:
+                seleccionadas.append(neurona)
+                continue
+            
+            omitidas.append({"neurona": neurona.nombre, "especialidad": especialidad, "razon": razon})
+        
+        return seleccionadas, omitidas
+    
+    def invalidar_cache(self):
+        """Descarta las respuestas cacheadas tras un cambio estructural del cerebro"""
+        with self.lock_estado:
+            self.version_estado += 1
+            self.cache_respuestas.invalidar()
+
+    @trazado("cerebro.evaluar_efectividad")
+    def _evaluar_efectividad(self, resultados):
+        confianzas = [r.get("confianza", 0) for r in resultados if "confianza" in r]
+        if not confianzas:
+            return 0.5
+        
+        confianza_promedio = sum(confianzas) / len(confianzas)
+        efectividad = min(1.0, confianza_promedio * 1.2)
+        
+        if self.evoluciones > 10:
+            efectividad = min(1.0, efectividad * (1 + (self.evoluciones / 100)))
+        
+        return efectividad
+
+    @trazado("cerebro.resumen")
+    def _crear_resumen_inteligente(self, resultados, efectividad, contexto):
+        recomendacion = self.sistema_aprendizaje.obtener_recomendacion(contexto)
+        
+        return {
+            "efectividad_sistema": round(efectividad, 3),
+            "energia_restante": self.energia_sistema,
+            "evoluciones": self.evoluciones,
+            "recomendacion_aprendizaje": recomendacion,
+            "neuronas_activas": self.registro.contar_con_energia()
+        }
+
+    @trazado("cerebro.actualizar_sistema")
+    def _actualizar_sistema(self, consultas=1):
+        # La recarga depende del tiempo transcurrido, no de las consultas: una neurona muy
+        # solicitada se queda sin energía y el enrutado la omite hasta que se recupera
+        with self.lock_estado:
+            ahora = time.monotonic()
+            transcurrido = ahora - self._ultima_recarga
+            self._ultima_recarga = ahora
+        self.registro.recargar_energia(RECARGA_ENERGIA_POR_SEGUNDO * transcurrido)
+        
+        with self.lock_estado:
+            for _ in range(consultas):
+                self.energia_sistema -= 3
+                
+                if self.energia_sistema <= 0:
+                    self.energia_sistema = 1000
+                    self.evoluciones += 1
+                    
+                    self.registro.incrementar_eficiencia(0.05, maximo=0.95)
+                    
+                    self.invalidar_cache()
+
+    def obtener_estado_avanzado(self):
+        return {
+            "autor": self.autor,
+            "ubicacion": self.ubicacion,
+            "total_neuronas": len(self.neuronas),
+            "energia_sistema": self.energia_sistema,
+            "evoluciones": self.evoluciones,
+            "experiencia_total": self.registro.experiencia_total(),
+            "nivel_aprendizaje": self.sistema_aprendizaje.conocimiento["evoluciones"],
+            "cola_escritura": self.base_datos.escritor.profundidad(),
+            "metas": self.generador_metas.resumen()
+        }
@@ -0,0 +1,205 @@
+"""Vocabularios, motor de palabras clave de una sola pasada, enrutamiento y ConsultaProcesada"""
+
+import re
+
+# ===== MOTOR DE PALABRAS CLAVE =====
+MAPEO_TEMAS = {
+    "aprendizaje": ("aprender", "enseñar", "estudiar", "conocimiento"),
+    "tecnologia": ("ia", "artificial", "algoritmo", "tecnología"),
+    "ciencia": ("investigación", "estudio", "descubrimiento", "ciencia"),
+    "filosofia": ("mente", "conciencia", "pensamiento", "filosofía")
+}
+
+RECURSOS_POR_ESPECIALIDAD = {
+    "percepcion_avanzada": ("analizar", "comprender"),
+    "logica_estructurada": ("razonar", "lógica"),
+    "memoria_asociativa": ("recordar", "conectar")
+}
+
+PALABRAS_EMOCION = {
+    "curiosidad": ("cómo", "por qué", "qué", "interesante"),
+    "interes": ("importante", "útil", "valioso", "interesante")
+}
+
+BASE_CONOCIMIENTO = {
+    "autoaprendizaje": (
+        "El aprendizaje automático mejora con la experiencia",
+        "La retroalimentación refina los patrones cognitivos"
+    ),
+    "neurociencia": (
+        "La plasticidad neuronal permite el aprendizaje continuo",
+        "Las sinapsis se fortalecen con el uso"
+    )
+}
+
+PATRONES_METAS = {
+    "desarrollar_razonamiento_filosofico": ("filosofía", "mente", "conciencia", "pensamiento"),
+    "mejorar_metodos_aprendizaje": ("aprender", "enseñar", "conocimiento", "educación"),
+    "explorar_tendencias_futuras": ("futuro", "tecnología", "innovación", "avance"),
+    "analisis_sistemas_complejos": ("complej", "sistema", "red", "conexión")
+}
+
+def _construir_vocabularios():
+    vocabularios = {"metodo:cientifica": ("cómo",)}
+    vocabularios.update({f"tema:{t}": p for t, p in MAPEO_TEMAS.items()})
+    vocabularios.update({f"recurso:{r}": p for r, p in RECURSOS_POR_ESPECIALIDAD.items()})
+    vocabularios.update({f"emocion:{e}": p for e, p in PALABRAS_EMOCION.items()})
+    vocabularios.update({f"meta:{m}": p for m, p in PATRONES_METAS.items()})
+    for dominio, conceptos in BASE_CONOCIMIENTO.items():
+        for concepto in conceptos:
+            vocabularios[f"conexion:{concepto}"] = tuple(concepto.lower().split()[:2])
+    return vocabularios
+
+def _regex_trie(palabras):
+    """Alternancia factorizada por prefijos comunes: cada posición se descarta con un solo carácter"""
+    trie = {}
+    for palabra in palabras:
+        nodo = trie
+        for caracter in palabra:
+            nodo = nodo.setdefault(caracter, {})
+        nodo[""] = {}
+    
+    def convertir(nodo):
+        ramas = [re.escape(c) + convertir(hijo) for c, hijo in sorted(nodo.items()) if c]
+        if not ramas:
+            return ""
+        cuerpo = ramas[0] if len(ramas) == 1 else "(?:" + "|".join(ramas) + ")"
+        # Sufijo opcional y codicioso: siempre se obtiene la palabra más larga
+        return f"(?:{cuerpo})?" if "" in nodo else cuerpo
+    
+    return convertir(trie)
+
+class Coincidencias:
+    """Resultado inmutable de una pasada del motor: palabras y grupos encontrados"""
+    __slots__ = ("palabras", "grupos")
+    
+    def __init__(self, palabras, grupos):
+        self.palabras = palabras
+        self.grupos = grupos
+    
+    def tiene(self, grupo):
+        return grupo in self.grupos
+    
+    def conteo(self, grupo):
+        """Número de palabras distintas del grupo presentes en el texto"""
+        return self.grupos.get(grupo, 0)
+
+class MotorPalabrasClave:
+    """Encuentra todo el vocabulario (con semántica de subcadena) en una sola pasada"""
+    def __init__(self, vocabularios):
+        self.vocabularios = {grupo: tuple(palabras) for grupo, palabras in vocabularios.items()}
+        self._grupos_por_palabra = {}
+        for grupo, palabras in self.vocabularios.items():
+            for palabra in palabras:
+                self._grupos_por_palabra.setdefault(palabra, []).append(grupo)
+        
+        palabras = sorted(self._grupos_por_palabra)
+        # Lookahead de ancho cero: se prueba cada posición del texto una sola vez y
+        # se obtiene la palabra más larga del vocabulario que empieza ahí
+        self._patron = re.compile("(?=(" + _regex_trie(palabras) + "))")
+        # Las demás palabras que empiezan en esa posición son prefijos de la encontrada
+        self._prefijos = {
+            palabra: tuple(
+                palabra[:n] for n in range(1, len(palabra) + 1)
+                if palabra[:n] in self._grupos_por_palabra
+            )
+            for palabra in palabras
+        }
+    
+    def analizar(self, texto):
+        """texto debe venir ya en minúsculas"""
+        palabras = set()
+        for coincidencia in self._patron.finditer(texto):
+            palabras.update(self._prefijos[coincidencia.group(1)])
+        
+        grupos = {}
+        for palabra in palabras:
+            for grupo in self._grupos_por_palabra[palabra]:
+                grupos[grupo] = grupos.get(grupo, 0) + 1
+        
+        return Coincidencias(frozenset(palabras), grupos)
+
+MOTOR_PALABRAS = MotorPalabrasClave(_construir_vocabularios())
+
+# Tablas precompiladas que consultan los manejadores en cada llamada
+GRUPOS_TEMAS = tuple((tema, f"tema:{tema}") for tema in MAPEO_TEMAS)
+GRUPOS_RECURSOS = tuple((especialidad, f"recurso:{especialidad}") for especialidad in RECURSOS_POR_ESPECIALIDAD)
+RECURSOS_POR_DEFECTO = ("percepcion_avanzada", "logica_estructurada")
+CONCEPTOS_CONOCIMIENTO = tuple(
+    (dominio, concepto, f"conexion:{concepto}")
+    for dominio, conceptos in BASE_CONOCIMIENTO.items()
+    for concepto in conceptos
+)
+TOTAL_PALABRAS_CURIOSIDAD = len(PALABRAS_EMOCION["curiosidad"])
+TOTAL_PALABRAS_INTERES = len(PALABRAS_EMOCION["interes"])
+METODOLOGIAS = {
+    "cientifica": ("Hipótesis", "Experimentación", "Análisis", "Conclusión"),
+    "sistemica": ("Análisis", "Síntesis", "Integración", "Evaluación")
+}
+BASES_IDEAS = ("experiencia", "patrones", "retroalimentación")
+CAPACIDADES_IDEAS = ("evoluciona", "se adapta", "aprende continuamente")
+
+# ===== ENRUTAMIENTO POR UMBRAL DE ACTIVACIÓN =====
+RELEVANCIA_BASE = 0.3
+RELEVANCIA_POR_GRUPO = 0.2
+
+# Grupos del motor de palabras que hacen relevante a cada especialidad
+AFINIDAD_ESPECIALIDAD = {
+    "percepcion_avanzada": tuple(grupo for _, grupo in GRUPOS_TEMAS) + ("recurso:percepcion_avanzada",),
+    "logica_estructurada": ("metodo:cientifica", "recurso:logica_estructurada"),
+    "memoria_asociativa": ("recurso:memoria_asociativa",) + tuple(grupo for _, _, grupo in CONCEPTOS_CONOCIMIENTO),
+    "creatividad_emergente": ("meta:explorar_tendencias_futuras", "meta:analisis_sistemas_complejos"),
+    "inteligencia_emocional": ("emocion:curiosidad", "emocion:interes"),
+    "autoaprendizaje": ("tema:aprendizaje", "meta:mejorar_metodos_aprendizaje")
+}
+
+def calcular_relevancia(especialidad, consulta, recomendadas):
+    """Puntuación barata en [0, 1]: 1.0 si el coordinador la recomienda, si no según sus grupos afines"""
+    if especialidad in recomendadas:
+        return 1.0
+    
+    grupos = consulta.coincidencias.grupos
+    aciertos = sum(1 for grupo in AFINIDAD_ESPECIALIDAD.get(especialidad, ()) if grupo in grupos)
+    return min(1.0, RELEVANCIA_BASE + RELEVANCIA_POR_GRUPO * aciertos)
+
+# ===== CONSULTA PROCESADA =====
+class ConsultaProcesada:
+    """Consulta normalizada y tokenizada una sola vez; inmutable y compartida por todo el pipeline"""
+    __slots__ = ("original", "texto", "tokens", "conteo_tokens", "patron", "coincidencias")
+    
+    def __init__(self, consulta):
+        texto = consulta.lower()
+        tokens = tuple(texto.split())
+        conteo_tokens = {}
+        for token in tokens:
+            conteo_tokens[token] = conteo_tokens.get(token, 0) + 1
+        
+        self._fijar(
+            consulta, texto, tokens, conteo_tokens,
+            "_".join(tokens[:3]), MOTOR_PALABRAS.analizar(texto)
+        )
+    
+    def _fijar(self, *valores):
+        for nombre, valor in zip(self.__slots__, valores):
+            object.__setattr__(self, nombre, valor)
+    
+    @classmethod
+    def _restaurar(cls, *valores):
+        consulta = cls.__new__(cls)
+        consulta._fijar(*valores)
+        return consulta
+    
+    def __reduce__(self):
+        # Viaja completa al proceso hijo, sin volver a tokenizar
+        return (ConsultaProcesada._restaurar, tuple(getattr(self, nombre) for nombre in self.__slots__))
+    
+    def __setattr__(self, nombre, valor):
+        raise AttributeError("ConsultaProcesada es inmutable")
+    
+    @property
+    def num_tokens(self):
+        return len(self.tokens)
+    
+    @classmethod
+    def desde(cls, consulta):
+        return consulta if isinstance(consulta, cls) else cls(consulta)
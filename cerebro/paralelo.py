@@ -0,0 +1,259 @@
+"""Ejecución concurrente de neuronas sobre un executor compartido por el proceso"""
+
+import time
+import os
+import asyncio
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+
+from .neuronas import NeuronaAutoaprendizaje
+from .trazas import trazado
+
+# ===== PROCESAMIENTO PARALELO OPTIMIZADO =====
+MAX_WORKERS_COMPARTIDOS = int(os.environ.get("CEREBRO_MAX_WORKERS", "8"))
+MAX_PROCESOS_COMPARTIDOS = int(os.environ.get("CEREBRO_MAX_PROCESOS", str(os.cpu_count() or 2)))
+PLAZO_NEURONA_SEGUNDOS = float(os.environ.get("CEREBRO_PLAZO_NEURONA", "10"))
+MODO_EJECUCION = os.environ.get("CEREBRO_MODO_EJECUCION", "hilos")  # "hilos" | "procesos"
+
+class EjecutorCompartido:
+    """Executor único por proceso (hilos o procesos) con contrapresión sobre los envíos"""
+    def __init__(self, max_workers, max_en_vuelo=None, procesos=False):
+        self.max_workers = max_workers
+        self.max_en_vuelo = max_en_vuelo or max_workers * 4
+        if procesos:
+            # Diferido: multiprocessing sólo se importa si se activa el modo procesos
+            from concurrent.futures import ProcessPoolExecutor
+            self.executor = ProcessPoolExecutor(max_workers=max_workers)
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cerebro")
+        self._cupos = threading.BoundedSemaphore(self.max_en_vuelo)
+        self._cupos_async = weakref.WeakKeyDictionary()  # bucle de eventos -> asyncio.Semaphore
+    
+    def enviar(self, funcion, *args, timeout=None):
+        """Espera hasta timeout a que haya cupo; devuelve None si el pool sigue saturado"""
+        if not self._cupos.acquire(timeout=timeout):
+            return None
+        
+        try:
+            future = self.executor.submit(funcion, *args)
+        except Exception:
+            self._cupos.release()
+            raise
+        
+        # También se ejecuta al cancelar el future, así el cupo nunca se pierde
+        future.add_done_callback(lambda _future: self._cupos.release())
+        return future
+    
+    async def ejecutar_async(self, funcion, *args):
+        """Variante asyncio de enviar: la espera de cupo suspende la corrutina, no un hilo,
+        así miles de consultas en vuelo comparten el mismo pool acotado"""
+        bucle = asyncio.get_running_loop()
+        cupos = self._cupos_async.get(bucle)
+        if cupos is None:
+            cupos = self._cupos_async.setdefault(bucle, asyncio.Semaphore(self.max_en_vuelo))
+        
+        async with cupos:
+            return await bucle.run_in_executor(self.executor, funcion, *args)
+
+_EJECUTOR_COMPARTIDO = None
+_EJECUTOR_PROCESOS = None
+_EJECUTOR_LOCK = threading.Lock()
+
+def obtener_ejecutor_compartido(max_workers=None):
+    """Devuelve el ejecutor del proceso; max_workers sólo aplica en la primera llamada"""
+    global _EJECUTOR_COMPARTIDO
+    with _EJECUTOR_LOCK:
+        if _EJECUTOR_COMPARTIDO is None:
+            _EJECUTOR_COMPARTIDO = EjecutorCompartido(max_workers or MAX_WORKERS_COMPARTIDOS)
+        return _EJECUTOR_COMPARTIDO
+
+def obtener_ejecutor_procesos(max_workers=None):
+    """Pool de procesos compartido, creado sólo cuando se activa el modo procesos"""
+    global _EJECUTOR_PROCESOS
+    with _EJECUTOR_LOCK:
+        if _EJECUTOR_PROCESOS is None:
+            _EJECUTOR_PROCESOS = EjecutorCompartido(
+                max_workers or MAX_PROCESOS_COMPARTIDOS, procesos=True
+            )
+        return _EJECUTOR_PROCESOS
+
+def _resultado_error(nombre, mensaje):
+    return {
+        "tipo": "error_procesamiento",
+        "error": mensaje,
+        "confianza": 0.1,
+        "neurona": nombre
+    }
+
+def _procesar_tanda_en_proceso(estado, trabajos):
+    """Una neurona procesa en orden sus trabajos (una consulta o las de un lote) y devuelve un único delta"""
+    neurona = NeuronaAutoaprendizaje.desde_estado(estado)
+    resultados = []
+    for consulta, contexto in trabajos:
+        try:
+            resultados.append(neurona.procesar(consulta, contexto))
+        except Exception as e:
+            resultados.append(_resultado_error(neurona.nombre, str(e)))
+    return resultados, neurona.delta_desde(estado)
+
+class ProcesadorParalelo:
+    def __init__(self, max_workers=None, plazo=PLAZO_NEURONA_SEGUNDOS, modo=None):
+        self.modo = modo or MODO_EJECUCION
+        if self.modo == "procesos":
+            self.ejecutor = obtener_ejecutor_procesos(max_workers)
+        else:
+            self.ejecutor = obtener_ejecutor_compartido(max_workers)
+        self.max_workers = self.ejecutor.max_workers
+        self.plazo = plazo
+    
+    @trazado("paralelo.neuronas")
+    def procesar_neuronas_paralelo(self, neuronas, consulta, contexto=None):
+        """Procesa neuronas en paralelo; el coste total es el de la neurona más lenta"""
+        seleccion = [n for n in neuronas if n.especialidad != "coordinacion_central"]
+        resultados = [None] * len(seleccion)
+        for indice, resultado in self.iterar_neuronas_paralelo(seleccion, consulta, contexto):
+            resultados[indice] = resultado
+        return resultados
+    
+    def iterar_neuronas_paralelo(self, neuronas, consulta, contexto=None):
+        """Generador de (posición, resultado) en el orden en que terminan las neuronas:
+        el primer resultado llega con la latencia de la neurona más rápida"""
+        seleccion = [n for n in neuronas if n.especialidad != "coordinacion_central"]
+        tandas = [(indice, neurona, [(consulta, contexto)]) for indice, neurona in enumerate(seleccion)]
+        for indice, (resultado,) in self._ejecutar_tandas(tandas, time.monotonic() + self.plazo):
+            yield indice, resultado
+    
+    async def procesar_neuronas_async(self, neuronas, consulta, contexto=None):
+        """Variante asyncio: cada neurona corre en el executor compartido con su propio
+        plazo (asyncio.wait_for) y se esperan todas con gather, sin bloquear el bucle de eventos"""
+        seleccion = [n for n in neuronas if n.especialidad != "coordinacion_central"]
+        return list(await asyncio.gather(*(
+            self._procesar_neurona_async(neurona, consulta, contexto) for neurona in seleccion
+        )))
+    
+    async def _procesar_neurona_async(self, neurona, consulta, contexto):
+        limite = time.monotonic() + self.plazo
+        try:
+            if self.modo != "procesos":
+                return await asyncio.wait_for(self.ejecutor.ejecutar_async(
+                    self._procesar_neurona_segura, neurona, consulta, contexto, limite
+                ), self.plazo)
+            
+            (resultado,), delta = await asyncio.wait_for(self.ejecutor.ejecutar_async(
+                _procesar_tanda_en_proceso, neurona.exportar_estado(), [(consulta, contexto)]
+            ), self.plazo)
+        except asyncio.TimeoutError:
+            # Cancelar la espera cancela también el future si la neurona aún no había arrancado
+            return self._resultado_error(neurona, f"Timeout en {neurona.nombre}")
+        except Exception as e:
+            return self._resultado_error(neurona, str(e))
+        
+        if delta:
+            neurona.aplicar_delta(delta)
+        return resultado
+    
+    @trazado("paralelo.lote")
+    def procesar_lote_paralelo(self, asignaciones):
+        """asignaciones: lista de (neuronas, consulta, contexto) por consulta del lote.
+        Se envía una tanda por neurona que procesa en orden las consultas que la activan;
+        devuelve, por consulta, los resultados en el orden de sus neuronas"""
+        resultados = []
+        tandas = {}  # neurona -> [(consulta, contexto)], [(indice consulta, posición)]
+        for indice, (neuronas, consulta, contexto) in enumerate(asignaciones):
+            seleccion = [n for n in neuronas if n.especialidad != "coordinacion_central"]
+            resultados.append([None] * len(seleccion))
+            for posicion, neurona in enumerate(seleccion):
+                trabajos, destinos = tandas.setdefault(neurona, ([], []))
+                trabajos.append((consulta, contexto))
+                destinos.append((indice, posicion))
+        
+        if not tandas:
+            return resultados
+        
+        # El plazo crece con la tanda más larga: cada consulta conserva su plazo por neurona
+        limite = time.monotonic() + self.plazo * max(len(trabajos) for trabajos, _ in tandas.values())
+        for neurona, salida in self._ejecutar_tandas(
+            [(neurona, neurona, trabajos) for neurona, (trabajos, _) in tandas.items()], limite
+        ):
+            for (indice, posicion), resultado in zip(tandas[neurona][1], salida):
+                resultados[indice][posicion] = resultado
+        
+        return resultados
+    
+    def _ejecutar_tandas(self, tandas, limite):
+        """Generador de (clave, resultados) en el orden en que terminan las tandas.
+        tandas: [(clave, neurona, [(consulta, contexto), ...])]; cada tanda devuelve un
+        resultado por trabajo, y lo que no se pudo enviar o no terminó a tiempo sale como error"""
+        saturadas = []
+        futures = {}
+        
+        # Todo se envía antes del primer yield: un consumidor lento no retrasa a las neuronas
+        for clave, neurona, trabajos in tandas:
+            future = self._enviar_tanda(neurona, trabajos, limite)
+            if future is None:
+                mensaje = f"Pool saturado para {neurona.nombre}"
+                saturadas.append((clave, self._errores(neurona, len(trabajos), mensaje)))
+            else:
+                futures[future] = (clave, neurona, len(trabajos))
+        
+        yield from saturadas
+        
+        pendientes = set(futures)
+        try:
+            for future in as_completed(futures, timeout=max(0.0, limite - time.monotonic())):
+                pendientes.discard(future)
+                clave, neurona, n = futures[future]
+                yield clave, self._recoger_tanda(neurona, future, n)
+        except FuturesTimeoutError:
+            for future in pendientes:
+                clave, neurona, n = futures[future]
+                # Lo que aún no arrancó se cancela; lo que está corriendo se descarta
+                if future.done() and not future.cancelled():
+                    yield clave, self._recoger_tanda(neurona, future, n)
+                else:
+                    future.cancel()
+                    yield clave, self._errores(neurona, n, f"Timeout en {neurona.nombre}")
+    
+    def _enviar_tanda(self, neurona, trabajos, limite):
+        timeout = max(0.0, limite - time.monotonic())
+        if self.modo == "procesos":
+            return self.ejecutor.enviar(
+                _procesar_tanda_en_proceso, neurona.exportar_estado(), trabajos, timeout=timeout
+            )
+        return self.ejecutor.enviar(self._procesar_tanda_segura, neurona, trabajos, limite, timeout=timeout)
+    
+    def _recoger_tanda(self, neurona, future, n):
+        if self.modo != "procesos":
+            return future.result()
+        
+        # En modo procesos el estado sólo cambia al fusionar el delta: el trabajo tardío se descarta
+        try:
+            salida, delta = future.result()
+        except Exception as e:
+            return self._errores(neurona, n, str(e))
+        neurona.aplicar_delta(delta)
+        return salida
+    
+    def _procesar_tanda_segura(self, neurona, trabajos, limite):
+        return [
+            self._procesar_neurona_segura(neurona, consulta, contexto, limite)
+            for consulta, contexto in trabajos
+        ]
+    
+    def _procesar_neurona_segura(self, neurona, consulta, contexto, limite):
+        if time.monotonic() >= limite:
+            # Plazo vencido mientras esperaba en cola: no se toca el estado de la neurona
+            return self._resultado_error(neurona, f"Timeout en {neurona.nombre}")
+        
+        try:
+            return neurona.procesar(consulta, contexto)
+        except Exception as e:
+            return self._resultado_error(neurona, str(e))
+    
+    def _resultado_error(self, neurona, mensaje):
+        return _resultado_error(neurona.nombre, mensaje)
+    
+    def _errores(self, neurona, n, mensaje):
+        return [self._resultado_error(neurona, mensaje) for _ in range(n)]
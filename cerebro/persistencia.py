@@ -0,0 +1,1250 @@
+"""Persistencia SQLite: pool WAL, escritor diferido, patrones perezosos y snapshots"""
+
+import json
+import os
+import asyncio
+import sqlite3
+import hashlib
+import zlib
+import threading
+import queue
+import time
+import logging
+from datetime import datetime
+from contextlib import contextmanager
+from collections import OrderedDict
+from itertools import islice
+
+from .trazas import trazado
+
+bitacora = logging.getLogger(__name__)
+
+# ===== POOL DE CONEXIONES SQLITE =====
+PRAGMAS_CONEXION = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",
+    "PRAGMA mmap_size=134217728",
+)
+
+class PoolConexiones:
+    """Pool thread-safe de conexiones SQLite en modo WAL con una única vía de escritura"""
+    def __init__(self, archivo_db, max_conexiones=8, timeout=30.0):
+        self.archivo_db = archivo_db
+        self.max_conexiones = max_conexiones
+        self.timeout = timeout
+        self.cerrado = False
+        self._libres = queue.LifoQueue()
+        self._creadas = 0
+        self._lock = threading.Lock()
+        self._lock_escritura = threading.Lock()
+    
+    def _crear_conexion(self):
+        # isolation_level=None: las transacciones se abren explícitamente en transaccion()
+        # cached_statements: las sentencias preparadas se reutilizan mientras viva la conexión
+        conn = sqlite3.connect(
+            self.archivo_db,
+            timeout=self.timeout,
+            check_same_thread=False,
+            isolation_level=None,
+            cached_statements=256
+        )
+        conn.execute(f"PRAGMA busy_timeout={int(self.timeout * 1000)}")
+        for pragma in PRAGMAS_CONEXION:
+            conn.execute(pragma)
+        return conn
+    
+    def _adquirir(self):
+        try:
+            return self._libres.get_nowait()
+        except queue.Empty:
+            pass
+        
+        with self._lock:
+            crear = self._creadas < self.max_conexiones
+            if crear:
+                self._creadas += 1
+        
+        if not crear:
+            return self._libres.get(timeout=self.timeout)
+        
+        try:
+            return self._crear_conexion()
+        except Exception:
+            with self._lock:
+                self._creadas -= 1
+            raise
+    
+    def _liberar(self, conn):
+        if self.cerrado:
+            conn.close()
+        elif conn.in_transaction:
+            # Una transacción que ni COMMIT ni ROLLBACK pudieron cerrar no vuelve al pool
+            self._descartar(conn)
+        else:
+            self._libres.put(conn)
+    
+    def _descartar(self, conn):
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        with self._lock:
+            self._creadas -= 1
+    
+    def _deshacer(self, conn):
+        """ROLLBACK tras un fallo del bloque o del propio COMMIT; si tampoco se puede,
+        la conexión queda con la transacción abierta y _liberar la descarta"""
+        if not conn.in_transaction:
+            return
+        try:
+            conn.execute("ROLLBACK")
+        except sqlite3.Error as e:
+            bitacora.warning("ROLLBACK fallido, se descarta la conexión: %s", e)
+    
+    @contextmanager
+    def lectura(self):
+        """Presta una conexión del pool para consultas de sólo lectura"""
+        conn = self._adquirir()
+        try:
+            yield conn
+        finally:
+            self._liberar(conn)
+    
+    @contextmanager
+    def carga_masiva(self):
+        """Transacción para importaciones: synchronous=OFF mientras dura; la durabilidad
+        llega con el checkpoint posterior"""
+        with self._lock_escritura:
+            conn = self._adquirir()
+            try:
+                conn.execute("PRAGMA synchronous=OFF")
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    yield conn
+                    conn.execute("COMMIT")
+                except BaseException:
+                    self._deshacer(conn)
+                    raise
+            finally:
+                try:
+                    if not conn.in_transaction:
+                        conn.execute("PRAGMA synchronous=NORMAL")
+                finally:
+                    self._liberar(conn)
+    
+    @contextmanager
+    def transaccion(self):
+        """Única vía de escritura: serializa los commits de todas las sesiones"""
+        with self._lock_escritura:
+            conn = self._adquirir()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    yield conn
+                    conn.execute("COMMIT")
+                except BaseException:
+                    self._deshacer(conn)
+                    raise
+            finally:
+                self._liberar(conn)
+    
+    def cerrar(self):
+        self.cerrado = True
+        while True:
+            try:
+                self._libres.get_nowait().close()
+            except queue.Empty:
+                break
+
+_POOLS = {}
+_POOLS_LOCK = threading.Lock()
+
+def obtener_pool(archivo_db):
+    """Devuelve el pool compartido por todo el proceso para un archivo de base de datos"""
+    ruta = os.path.abspath(archivo_db)
+    with _POOLS_LOCK:
+        pool = _POOLS.get(ruta)
+        if pool is None or pool.cerrado:
+            pool = _POOLS[ruta] = PoolConexiones(ruta)
+        return pool
+
+# ===== ESCRITURA DIFERIDA =====
+DURABILIDAD_ESCRITURA = os.environ.get("CEREBRO_DURABILIDAD", "diferida")  # "diferida" o "sincrona"
+MAX_COLA_ESCRITURA = int(os.environ.get("CEREBRO_COLA_ESCRITURA", "256"))
+MAX_REINTENTOS_ESCRITURA = int(os.environ.get("CEREBRO_REINTENTOS_ESCRITURA", "3"))
+ESPERA_REINTENTO_SEGUNDOS = 1.0  # Se multiplica por el número de intentos ya hechos
+
+class _MarcaAsync:
+    """Marca de flush que, desde el hilo escritor, resuelve un future del bucle de asyncio"""
+    __slots__ = ("bucle", "future")
+    
+    def __init__(self, bucle):
+        self.bucle = bucle
+        self.future = bucle.create_future()
+    
+    def set(self):
+        try:
+            self.bucle.call_soon_threadsafe(self._resolver)
+        except RuntimeError:
+            pass  # El bucle ya se cerró: nadie espera la marca
+    
+    def _resolver(self):
+        if not self.future.done():
+            self.future.set_result(True)
+
+class EscritorDiferido:
+    """Hilo escritor único alimentado por una cola acotada: el fsync sale del camino de la
+    consulta, los lotes de patrones consecutivos se fusionan por clave y cada lote fusionado
+    se confirma en una sola transacción"""
+    def __init__(self, base_datos, max_cola=MAX_COLA_ESCRITURA, durabilidad=DURABILIDAD_ESCRITURA):
+        self.base_datos = base_datos
+        self.durabilidad = durabilidad
+        self._cola = queue.Queue(maxsize=max_cola)
+        self._pendientes = {}  # patron -> datos encolados y aún no confirmados
+        self._reintentar = {}  # patron -> (datos, filas_indice, intentos, próximo intento, callbacks)
+        self._lock = threading.Lock()
+        self._hilo = None
+        self.confirmadas = 0
+        self.errores = 0
+        self.descartados = 0
+        self.ultimo_error = None
+    
+    def _arrancar(self):
+        with self._lock:
+            if self._hilo is None or not self._hilo.is_alive():
+                self._hilo = threading.Thread(target=self._bucle, name="escritor-cerebro", daemon=True)
+                self._hilo.start()
+    
+    def _poner(self, operacion):
+        self._arrancar()
+        # Cola llena: el productor espera (contrapresión) en lugar de acumular memoria
+        self._cola.put(operacion)
+        if self.durabilidad == "sincrona":
+            self.flush()
+    
+    def encolar_patrones(self, patrones, filas_indice=(), al_confirmar=None):
+        """Los datos se copian: el hilo escritor nunca ve dicts a medio modificar.
+        al_confirmar(patrones) recibe los patrones de cada escritura que llega a disco"""
+        lote = {patron: dict(datos) for patron, datos in patrones.items()}
+        with self._lock:
+            self._pendientes.update(lote)
+        self._poner(("patrones", lote, list(filas_indice), al_confirmar))
+    
+    def encolar(self, funcion, *args):
+        self._poner(("llamada", funcion, args, None))
+    
+    def patron_pendiente(self, patron):
+        with self._lock:
+            return self._pendientes.get(patron)
+    
+    def patrones_pendientes(self):
+        with self._lock:
+            return dict(self._pendientes)
+    
+    def profundidad(self):
+        return self._cola.qsize()
+    
+    def flush(self, timeout=None):
+        """Espera a que todo lo encolado hasta ahora esté confirmado en disco"""
+        if self._hilo is None:
+            return True
+        
+        confirmado = threading.Event()
+        self._poner_marca(confirmado)
+        return confirmado.wait(timeout)
+    
+    async def flush_async(self, timeout=None):
+        """flush para asyncio: la corrutina se suspende hasta la confirmación sin ocupar un hilo"""
+        if self._hilo is None:
+            return True
+        
+        bucle = asyncio.get_running_loop()
+        marca = _MarcaAsync(bucle)
+        try:
+            self._poner_marca(marca, bloquear=False)
+        except queue.Full:
+            # Cola llena: la contrapresión se espera en un hilo auxiliar, no en el bucle
+            await bucle.run_in_executor(None, self._poner_marca, marca)
+        
+        try:
+            return await asyncio.wait_for(marca.future, timeout)
+        except asyncio.TimeoutError:
+            return False
+    
+    def _poner_marca(self, marca, bloquear=True):
+        # Si el hilo escritor hubiera muerto, la marca nunca se confirmaría: se relanza antes
+        self._arrancar()
+        self._cola.put(("marca", marca, None, None), block=bloquear)
+    
+    def estadisticas(self):
+        with self._lock:
+            pendientes = len(self._pendientes)
+        return {
+            "profundidad_cola": self._cola.qsize(),
+            "patrones_pendientes": pendientes,
+            "lotes_confirmados": self.confirmadas,
+            "errores": self.errores,
+            "reintentos_pendientes": len(self._reintentar),
+            "descartados": self.descartados
+        }
+    
+    def _bucle(self):
+        while True:
+            try:
+                operaciones = [self._cola.get(timeout=self._espera_reintento())]
+            except queue.Empty:
+                operaciones = []
+            # Se drena lo que ya esté encolado para fusionar lotes de patrones consecutivos
+            while True:
+                try:
+                    operaciones.append(self._cola.get_nowait())
+                except queue.Empty:
+                    break
+            
+            try:
+                self._procesar(operaciones)
+            except Exception as e:
+                # El hilo sobrevive a cualquier fallo; las marcas se liberan para que nadie
+                # espere para siempre (el error queda en errores/ultimo_error)
+                self._registrar_error(e)
+                for tipo, carga, _, _ in operaciones:
+                    if tipo == "marca":
+                        carga.set()
+            finally:
+                for _ in operaciones:
+                    self._cola.task_done()
+    
+    def _procesar(self, operaciones):
+        fusionados, filas_indice, callbacks = {}, [], []
+        
+        for tipo, carga, args, al_confirmar in operaciones:
+            if tipo == "patrones":
+                fusionados.update(carga)
+                filas_indice.extend(args)
+                if al_confirmar is not None:
+                    callbacks.append(al_confirmar)
+                continue
+            
+            # Cualquier otra operación respeta el orden: antes se confirman los patrones previos
+            self._confirmar_patrones(fusionados, filas_indice, callbacks)
+            fusionados, filas_indice, callbacks = {}, [], []
+            
+            if tipo == "marca":
+                carga.set()
+            else:
+                self._ejecutar(carga, *args)
+        
+        self._confirmar_patrones(fusionados, filas_indice, callbacks)
+        self._reintentar_fallidos()
+    
+    def _ejecutar(self, funcion, *args):
+        try:
+            funcion(*args)
+            self.confirmadas += 1
+            return True
+        except Exception as e:
+            self._registrar_error(e)
+            return False
+    
+    def _registrar_error(self, e):
+        self.errores += 1
+        self.ultimo_error = repr(e)
+    
+    def _confirmar_patrones(self, fusionados, filas_indice, callbacks):
+        # Un valor más reciente sustituye al que esperaba reintento y hereda sus callbacks
+        for patron in fusionados:
+            aplazado = self._reintentar.pop(patron, None)
+            if aplazado is not None:
+                callbacks.extend(c for c in aplazado[4] if c not in callbacks)
+        if not fusionados and not filas_indice:
+            return
+        
+        if self._ejecutar(self.base_datos.escribir_patrones, fusionados, filas_indice):
+            self._confirmados(fusionados)
+            self._avisar(callbacks, set(fusionados))
+        else:
+            # El lote se reparte por patrón: una fila defectuosa no arrastra a las demás
+            filas_por_patron = {}
+            for fila in filas_indice:
+                filas_por_patron.setdefault(fila[1], []).append(fila)
+            for patron in fusionados.keys() | filas_por_patron.keys():
+                self._escribir_o_aplazar(
+                    patron, fusionados.get(patron), filas_por_patron.get(patron, []), 1, callbacks
+                )
+    
+    def _avisar(self, callbacks, confirmados):
+        for al_confirmar in callbacks:
+            try:
+                al_confirmar(confirmados)
+            except Exception as e:
+                self._registrar_error(e)
+    
+    def _escribir_o_aplazar(self, patron, datos, filas_indice, intentos, callbacks):
+        """Escribe un patrón suelto; si falla espera su turno de reintento y, agotados los
+        intentos, se descarta (deja de figurar como pendiente) y queda registrado.
+        Los callbacks sólo reciben el patrón si llega a escribirse"""
+        patrones = {patron: datos} if datos is not None else {}
+        if self._ejecutar(self.base_datos.escribir_patrones, patrones, filas_indice):
+            self._confirmados(patrones)
+            self._avisar(callbacks, {patron})
+        elif intentos < MAX_REINTENTOS_ESCRITURA:
+            proximo = time.monotonic() + ESPERA_REINTENTO_SEGUNDOS * intentos
+            self._reintentar[patron] = (datos, filas_indice, intentos + 1, proximo, callbacks)
+        else:
+            self.descartados += 1
+            self._confirmados(patrones)
+            bitacora.error(
+                "Patrón %r descartado tras %d intentos de escritura: %s", patron, intentos, self.ultimo_error
+            )
+    
+    def _reintentar_fallidos(self):
+        ahora = time.monotonic()
+        for patron, (datos, filas_indice, intentos, proximo, callbacks) in list(self._reintentar.items()):
+            if proximo <= ahora:
+                del self._reintentar[patron]
+                self._escribir_o_aplazar(patron, datos, filas_indice, intentos, callbacks)
+    
+    def _espera_reintento(self):
+        """Sin nada encolado el hilo despierta a tiempo para el próximo reintento"""
+        if not self._reintentar:
+            return None
+        return max(0.0, min(aplazado[3] for aplazado in self._reintentar.values()) - time.monotonic())
+    
+    def _confirmados(self, patrones):
+        with self._lock:
+            for patron, datos in patrones.items():
+                if self._pendientes.get(patron) is datos:
+                    del self._pendientes[patron]
+
+# ===== BASE DE DATOS SQLITE =====
+SQL_UPSERT_PATRON = '''
+    INSERT INTO conocimiento (patron, efectividad, veces_usado, ultimo_uso, tipo)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(patron) DO UPDATE SET
+        efectividad = excluded.efectividad,
+        veces_usado = excluded.veces_usado,
+        ultimo_uso = excluded.ultimo_uso
+'''
+
+SQL_CARGAR_PATRONES = "SELECT patron, efectividad, veces_usado, ultimo_uso FROM conocimiento"
+
+# Cada entrada del índice lleva la efectividad del patrón para ordenar el top por término
+SQL_INSERTAR_INDICE_PATRON = '''
+    INSERT INTO indice_patrones (token, patron, efectividad, veces_usado) VALUES (?, ?, ?, ?)
+    ON CONFLICT(token, patron) DO UPDATE SET
+        efectividad = excluded.efectividad,
+        veces_usado = excluded.veces_usado
+'''
+
+SQL_OBTENER_PATRON = "SELECT efectividad, veces_usado, ultimo_uso FROM conocimiento WHERE patron = ?"
+
+SQL_CONTAR_PATRONES = "SELECT COUNT(*) FROM conocimiento"
+
+SQL_LISTAR_PATRONES = '''
+    SELECT patron, efectividad, veces_usado, ultimo_uso FROM conocimiento
+    WHERE patron > ? ORDER BY patron LIMIT ?
+'''
+
+# Recorre idx_indice_patrones_ranking y se detiene en el límite: el coste no depende de
+# cuántos patrones compartan el término
+SQL_CANDIDATOS_TERMINO = '''
+    SELECT i.patron, c.efectividad, c.veces_usado, c.ultimo_uso
+    FROM indice_patrones i CROSS JOIN conocimiento c ON c.patron = i.patron
+    WHERE i.token = ?
+    ORDER BY i.efectividad DESC, i.veces_usado DESC
+    LIMIT ?
+'''
+
+SQL_COLUMNAS_INDICE = "PRAGMA table_info(indice_patrones)"
+
+SQL_RELLENAR_RANKING_INDICE = '''
+    UPDATE indice_patrones SET (efectividad, veces_usado) = (
+        SELECT c.efectividad, c.veces_usado FROM conocimiento c WHERE c.patron = indice_patrones.patron
+    )
+'''
+
+SQL_INDICE_VACIO = "SELECT NOT EXISTS (SELECT 1 FROM indice_patrones)"
+
+SQL_INSERTAR_HISTORIAL = '''
+    INSERT INTO historial (timestamp, consulta, efectividad, resultados) VALUES (?, ?, ?, ?)
+'''
+
+SQL_INSERTAR_META = '''
+    INSERT INTO metas (meta, tipo, prioridad, progreso, estado, creada_en)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+
+SQL_ACTUALIZAR_META = '''
+    UPDATE metas SET progreso = ?, estado = ?, completada_en = ?
+    WHERE meta = ? AND estado = 'activa'
+'''
+
+SQL_METAS_REGISTRADAS = "SELECT DISTINCT meta FROM metas"
+
+SQL_METAS_ACTIVAS = '''
+    SELECT id, meta, tipo, prioridad, progreso, creada_en 
+    FROM metas 
+    WHERE estado = ? 
+    ORDER BY prioridad DESC
+'''
+
+SQL_SNAPSHOT_POR_ID = '''
+    SELECT id, timestamp, datos, efectividad_previa, hash_integridad 
+    FROM snapshots 
+    WHERE id = ?
+'''
+
+SQL_SNAPSHOT_POR_HASH = '''
+    SELECT id FROM snapshots WHERE hash_integridad = ? ORDER BY id DESC LIMIT 1
+'''
+
+SQL_INSERTAR_SNAPSHOT = '''
+    INSERT INTO snapshots (timestamp, hash_integridad, datos, efectividad_previa, estable)
+    VALUES (?, ?, ?, ?, ?)
+'''
+
+SQL_INSERTAR_SECCION = '''
+    INSERT OR IGNORE INTO snapshot_secciones (hash, base, profundidad, datos)
+    VALUES (?, ?, ?, ?)
+'''
+
+SQL_CARGAR_SECCION = "SELECT base, datos FROM snapshot_secciones WHERE hash = ?"
+
+SQL_ACTUALIZAR_INDICE = "INSERT OR REPLACE INTO snapshot_indice (clave, snapshot_id) VALUES (?, ?)"
+
+SQL_LEER_INDICE = "SELECT snapshot_id FROM snapshot_indice WHERE clave = ?"
+
+SQL_OBTENER_PATRONES = "SELECT patron, efectividad, veces_usado, ultimo_uso FROM conocimiento WHERE patron IN ({marcadores})"
+
+SQL_BORRAR_PATRON = "DELETE FROM conocimiento WHERE patron = ?"
+
+SQL_BORRAR_INDICE_PATRON = "DELETE FROM indice_patrones WHERE token = ? AND patron = ?"
+
+SQL_MANIFIESTO_SNAPSHOT = "SELECT datos FROM snapshots WHERE id = ?"
+
+SQL_LISTAR_SNAPSHOTS = "SELECT id, timestamp FROM snapshots ORDER BY id DESC"
+
+SQL_SNAPSHOTS_INDEXADOS = "SELECT snapshot_id FROM snapshot_indice"
+
+SQL_BORRAR_SNAPSHOT = "DELETE FROM snapshots WHERE id = ?"
+
+SQL_MANIFIESTOS = "SELECT datos FROM snapshots"
+
+SQL_BASES_SECCIONES = "SELECT hash, base FROM snapshot_secciones"
+
+SQL_BORRAR_SECCION = "DELETE FROM snapshot_secciones WHERE hash = ?"
+
+# Índices secundarios: la importación masiva los elimina y los recrea al final
+INDICES_SECUNDARIOS = (
+    ("idx_indice_patrones_ranking",
+     "CREATE INDEX IF NOT EXISTS idx_indice_patrones_ranking "
+     "ON indice_patrones(token, efectividad DESC, veces_usado DESC)"),
+    ("idx_snapshots_hash",
+     "CREATE INDEX IF NOT EXISTS idx_snapshots_hash ON snapshots(hash_integridad)"),
+    ("idx_metas_estado_prioridad",
+     "CREATE INDEX IF NOT EXISTS idx_metas_estado_prioridad ON metas(estado, prioridad DESC)"),
+)
+
+# ===== SERIALIZACIÓN DE SNAPSHOTS =====
+FORMATO_SNAPSHOT = 2
+MAX_PROFUNDIDAD_DELTA = 32  # Cada 32 deltas se guarda de nuevo la sección completa
+
+def _codificar_seccion(contenido):
+    """JSON canónico comprimido con zlib; el hash se calcula sobre el contenido sin comprimir"""
+    crudo = json.dumps(contenido, separators=(",", ":"), sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(crudo).hexdigest(), zlib.compress(crudo, 6)
+
+def _decodificar_seccion(blob):
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+# ===== RETENCIÓN DE SNAPSHOTS =====
+RETENCION_ULTIMOS = int(os.environ.get("CEREBRO_SNAPSHOTS_ULTIMOS", "10"))
+RETENCION_HORARIOS = int(os.environ.get("CEREBRO_SNAPSHOTS_HORARIOS", "24"))
+RETENCION_DIARIOS = int(os.environ.get("CEREBRO_SNAPSHOTS_DIARIOS", "7"))
+COMPACTAR_CADA = int(os.environ.get("CEREBRO_COMPACTAR_CADA", "10"))  # Snapshots entre compactaciones
+
+class PoliticaRetencion:
+    """Conserva los últimos N snapshots y el más reciente de cada una de las últimas
+    horas y días en los que hubo snapshots"""
+    def __init__(self, ultimos=RETENCION_ULTIMOS, horarios=RETENCION_HORARIOS, diarios=RETENCION_DIARIOS):
+        self.ultimos = ultimos
+        self.horarios = horarios
+        self.diarios = diarios
+    
+    def seleccionar(self, snapshots):
+        """snapshots: [(id, timestamp ISO)] de más reciente a más antiguo; devuelve los ids a conservar"""
+        conservar = {snapshot_id for snapshot_id, _ in snapshots[:self.ultimos]}
+        
+        # "AAAA-MM-DDTHH" agrupa por hora y "AAAA-MM-DD" por día
+        for longitud, cupo in ((13, self.horarios), (10, self.diarios)):
+            periodos = set()
+            for snapshot_id, timestamp in snapshots:
+                if len(periodos) >= cupo:
+                    break
+                periodo = (timestamp or "")[:longitud]
+                if periodo not in periodos:
+                    periodos.add(periodo)
+                    conservar.add(snapshot_id)
+        return conservar
+
+# ===== CONJUNTO CALIENTE DE PATRONES =====
+CAPACIDAD_PATRONES_CALIENTES = int(os.environ.get("CEREBRO_PATRONES_CALIENTES", "2048"))
+PATRONES_POR_PAGINA = 5
+
+class PatronesPerezosos:
+    """Vista perezosa de la tabla conocimiento: los patrones usados recientemente viven en
+    memoria con desalojo LRU y los fallos se resuelven con una búsqueda puntual por clave.
+    Los patrones fijados (modificados y aún no persistidos) nunca se desalojan."""
+    def __init__(self, base_datos, capacidad=CAPACIDAD_PATRONES_CALIENTES):
+        self.base_datos = base_datos
+        self.capacidad = capacidad
+        self._calientes = OrderedDict()
+        self._fijados = set()
+        self._nuevos = set()  # Creados en memoria, todavía no están en la tabla
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+    
+    def __len__(self):
+        with self._lock:
+            nuevos = len(self._nuevos)
+        return self.base_datos.contar_patrones() + nuevos
+    
+    def __contains__(self, patron):
+        return self.get(patron) is not None
+    
+    def __getitem__(self, patron):
+        datos = self.get(patron)
+        if datos is None:
+            raise KeyError(patron)
+        return datos
+    
+    def __setitem__(self, patron, datos):
+        with self._lock:
+            if patron not in self._calientes:
+                self._nuevos.add(patron)
+            self._calientes[patron] = datos
+            self._calientes.move_to_end(patron)
+            self._desalojar()
+    
+    def __iter__(self):
+        return (patron for patron, _ in self.items())
+    
+    def get(self, patron, defecto=None):
+        with self._lock:
+            datos = self._calientes.get(patron)
+            if datos is not None:
+                self._calientes.move_to_end(patron)
+                self.aciertos += 1
+                return datos
+            self.fallos += 1
+        
+        datos = self.base_datos.obtener_patron(patron)
+        if datos is None:
+            return defecto
+        
+        with self._lock:
+            # Otro hilo pudo cargarlo mientras se consultaba la base de datos
+            datos = self._calientes.setdefault(patron, datos)
+            self._calientes.move_to_end(patron)
+            self._desalojar()
+        return datos
+    
+    def en_memoria(self, patron):
+        """Valor en memoria sin tocar la base de datos ni el orden LRU"""
+        with self._lock:
+            return self._calientes.get(patron)
+    
+    def fijar(self, patron):
+        with self._lock:
+            self._fijados.add(patron)
+    
+    def liberar(self, patrones):
+        """Los patrones ya persistidos vuelven a ser desalojables"""
+        with self._lock:
+            for patron in patrones:
+                self._fijados.discard(patron)
+                self._nuevos.discard(patron)
+            self._desalojar()
+    
+    def _desalojar(self):
+        exceso = len(self._calientes) - self.capacidad
+        if exceso <= 0:
+            return
+        
+        victimas = list(islice((p for p in self._calientes if p not in self._fijados), exceso))
+        for patron in victimas:
+            del self._calientes[patron]
+    
+    def items(self):
+        """Recorre todos los patrones: tabla con los valores en memoria superpuestos"""
+        with self._lock:
+            memoria = dict(self._calientes)
+        
+        for patron, datos in self.base_datos.iterar_patrones():
+            yield patron, memoria.pop(patron, datos)
+        yield from memoria.items()
+    
+    def estadisticas(self):
+        with self._lock:
+            return {
+                "en_memoria": len(self._calientes),
+                "fijados": len(self._fijados),
+                "aciertos": self.aciertos,
+                "fallos": self.fallos
+            }
+
+class BaseDatosCubana:
+    def __init__(self, archivo_db="cerebro_autonomo.db", retencion=None):
+        self.archivo_db = archivo_db
+        self.pool = obtener_pool(archivo_db)
+        self.escritor = EscritorDiferido(self)
+        self.retencion = retencion or PoliticaRetencion()
+        self._ultima_seccion_patrones = None  # (hash, profundidad) del último snapshot creado aquí
+        self._secciones_fallidas = set()  # Secciones de patrones cuya escritura falló
+        self._lock_snapshot = threading.Lock()  # Ordena crear_snapshot con su encolado
+        self._lock_secciones = threading.Lock()  # Lo comparten crear_snapshot y el hilo escritor
+        self._snapshots_sin_compactar = 0
+        self.inicializar_db()
+    
+    def inicializar_db(self):
+        with self.pool.transaccion() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS conocimiento (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    patron TEXT UNIQUE,
+                    efectividad REAL,
+                    veces_usado INTEGER,
+                    ultimo_uso TEXT,
+                    tipo TEXT
+                )
+            ''')
+            
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS snapshots (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    timestamp TEXT,
+                    hash_integridad TEXT,
+                    datos TEXT,
+                    efectividad_previa REAL,
+                    estable INTEGER DEFAULT 1
+                )
+            ''')
+            
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS metas (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    meta TEXT,
+                    tipo TEXT,
+                    prioridad REAL,
+                    progreso REAL,
+                    estado TEXT,
+                    creada_en TEXT,
+                    completada_en TEXT
+                )
+            ''')
+            
+            # Índice invertido término -> patrón para obtener_recomendacion
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS indice_patrones (
+                    token TEXT,
+                    patron TEXT,
+                    efectividad REAL,
+                    veces_usado INTEGER,
+                    PRIMARY KEY (token, patron)
+                ) WITHOUT ROWID
+            ''')
+            
+            columnas = {fila[1] for fila in conn.execute(SQL_COLUMNAS_INDICE)}
+            if "efectividad" not in columnas:
+                # Índice anterior al ranking por término: se amplía y se rellena una única vez
+                conn.execute("ALTER TABLE indice_patrones ADD COLUMN efectividad REAL")
+                conn.execute("ALTER TABLE indice_patrones ADD COLUMN veces_usado INTEGER")
+                conn.execute(SQL_RELLENAR_RANKING_INDICE)
+            
+            # Sólo se usa si el historial circular derrama las experiencias completas
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS historial (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    timestamp REAL,
+                    consulta TEXT,
+                    efectividad REAL,
+                    resultados TEXT
+                )
+            ''')
+            
+            # Secciones de snapshot direccionadas por contenido: cada estado idéntico se guarda una vez
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS snapshot_secciones (
+                    hash TEXT PRIMARY KEY,
+                    base TEXT,
+                    profundidad INTEGER DEFAULT 0,
+                    datos BLOB
+                )
+            ''')
+            
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS snapshot_indice (
+                    clave TEXT PRIMARY KEY,
+                    snapshot_id INTEGER
+                )
+            ''')
+            
+            # Sustituido por idx_indice_patrones_ranking: el top-k ya no recorre conocimiento
+            conn.execute("DROP INDEX IF EXISTS idx_conocimiento_efectividad")
+            for _, sql in INDICES_SECUNDARIOS:
+                conn.execute(sql)
+    
+    @trazado("bd.guardar_patrones")
+    def guardar_patrones(self, patrones, filas_indice=(), al_confirmar=None):
+        """Encola el upsert de los patrones y sus entradas de índice en el escritor diferido"""
+        if not patrones and not filas_indice:
+            return
+        self.escritor.encolar_patrones(patrones, filas_indice, al_confirmar)
+    
+    @trazado("bd.escribir_patrones")
+    def escribir_patrones(self, patrones, filas_indice=()):
+        """Upsert en lote de los patrones indicados y sus entradas de índice, en una sola transacción"""
+        filas = [
+            (patron, datos["efectividad"], datos["veces_usado"], datos["ultimo_uso"], "patron")
+            for patron, datos in patrones.items()
+        ]
+        
+        with self.pool.transaccion() as conn:
+            conn.executemany(SQL_UPSERT_PATRON, filas)
+            conn.executemany(SQL_INSERTAR_INDICE_PATRON, filas_indice)
+    
+    def guardar_indice_patrones(self, filas_indice):
+        self.guardar_patrones({}, filas_indice)
+    
+    def indice_patrones_vacio(self):
+        with self.pool.lectura() as conn:
+            return bool(conn.execute(SQL_INDICE_VACIO).fetchone()[0])
+    
+    def reconstruir_indice_patrones(self, tokenizador, lote=5000):
+        """Construye el índice invertido recorriendo la tabla en streaming, por lotes"""
+        filas = []
+        for patron, datos in self.iterar_patrones():
+            filas.extend(
+                (token, patron, datos["efectividad"], datos["veces_usado"]) for token in tokenizador(patron)
+            )
+            if len(filas) >= lote:
+                self.guardar_indice_patrones(filas)
+                filas = []
+        self.guardar_indice_patrones(filas)
+    
+    @trazado("bd.buscar_candidatos")
+    def buscar_candidatos(self, terminos, limite):
+        """Los `limite` patrones más efectivos de cada término: {patron: (compartidos, datos)},
+        donde compartidos cuenta en cuántos de esos tops aparece. Valores tal como están en la
+        tabla; quien llama superpone lo que tenga en memoria"""
+        candidatos = {}
+        with self.pool.lectura() as conn:
+            for termino in terminos:
+                for patron, efectividad, veces_usado, ultimo_uso in conn.execute(
+                    SQL_CANDIDATOS_TERMINO, (termino, limite)
+                ):
+                    compartidos, datos = candidatos.get(patron, (0, None))
+                    candidatos[patron] = (compartidos + 1, datos or {
+                        "efectividad": efectividad, "veces_usado": veces_usado, "ultimo_uso": ultimo_uso
+                    })
+        return candidatos
+    
+    @trazado("bd.obtener_patron")
+    def obtener_patron(self, patron):
+        """Búsqueda puntual por la clave única de conocimiento; lo encolado prevalece sobre el disco"""
+        pendiente = self.escritor.patron_pendiente(patron)
+        if pendiente is not None:
+            return pendiente
+        
+        with self.pool.lectura() as conn:
+            fila = conn.execute(SQL_OBTENER_PATRON, (patron,)).fetchone()
+        
+        if fila is None:
+            return None
+        return {"efectividad": fila[0], "veces_usado": fila[1], "ultimo_uso": fila[2]}
+    
+    @trazado("bd.obtener_patrones")
+    def obtener_patrones(self, patrones, lote=500):
+        """Búsqueda por lotes de claves; lo encolado prevalece sobre el disco"""
+        patrones = list(patrones)
+        encontrados = {}
+        with self.pool.lectura() as conn:
+            for inicio in range(0, len(patrones), lote):
+                claves = patrones[inicio:inicio + lote]
+                sql = SQL_OBTENER_PATRONES.format(marcadores=", ".join("?" * len(claves)))
+                for fila in conn.execute(sql, claves):
+                    encontrados[fila[0]] = {"efectividad": fila[1], "veces_usado": fila[2], "ultimo_uso": fila[3]}
+        
+        for patron in patrones:
+            pendiente = self.escritor.patron_pendiente(patron)
+            if pendiente is not None:
+                encontrados[patron] = pendiente
+        return encontrados
+    
+    def aplicar_diferencias_patrones(self, cambios, eliminados, filas_indice=(), filas_indice_borradas=()):
+        """Encola upserts y borrados de patrones (con sus entradas de índice) en una transacción"""
+        self.escritor.encolar(self._escribir_diferencias, cambios, eliminados, filas_indice, filas_indice_borradas)
+    
+    @trazado("bd.escribir_diferencias")
+    def _escribir_diferencias(self, cambios, eliminados, filas_indice, filas_indice_borradas):
+        filas = [
+            (patron, datos["efectividad"], datos["veces_usado"], datos["ultimo_uso"], "patron")
+            for patron, datos in cambios.items()
+        ]
+        
+        with self.pool.transaccion() as conn:
+            conn.executemany(SQL_UPSERT_PATRON, filas)
+            conn.executemany(SQL_BORRAR_PATRON, [(patron,) for patron in eliminados])
+            conn.executemany(SQL_INSERTAR_INDICE_PATRON, filas_indice)
+            conn.executemany(SQL_BORRAR_INDICE_PATRON, filas_indice_borradas)
+    
+    @trazado("bd.contar_patrones")
+    def contar_patrones(self):
+        with self.pool.lectura() as conn:
+            return conn.execute(SQL_CONTAR_PATRONES).fetchone()[0]
+    
+    @trazado("bd.listar_patrones")
+    def listar_patrones(self, despues_de="", limite=20):
+        """Página de patrones ordenada por clave; el cursor es la última clave de la página anterior"""
+        with self.pool.lectura() as conn:
+            filas = conn.execute(SQL_LISTAR_PATRONES, (despues_de, limite)).fetchall()
+        
+        return [
+            (fila[0], self.escritor.patron_pendiente(fila[0])
+             or {"efectividad": fila[1], "veces_usado": fila[2], "ultimo_uso": fila[3]})
+            for fila in filas
+        ]
+    
+    def iterar_patrones(self):
+        """Recorre toda la tabla sin materializarla; sólo para snapshots completos y reindexado"""
+        pendientes = self.escritor.patrones_pendientes()
+        with self.pool.lectura() as conn:
+            for fila in conn.execute(SQL_CARGAR_PATRONES):
+                yield fila[0], pendientes.pop(fila[0], None) or {
+                    "efectividad": fila[1], "veces_usado": fila[2], "ultimo_uso": fila[3]
+                }
+        yield from pendientes.items()
+    
+    def cargar_conocimiento(self):
+        """Los patrones no se leen aquí: se cargan bajo demanda a través de PatronesPerezosos"""
+        return {
+            "patrones_aprendidos": PatronesPerezosos(self),
+            "eficiencia_neuronas": {},
+            "conexiones_efectivas": [],
+            "errores_evitados": [],
+            "evoluciones": 0
+        }
+    
+    @trazado("bd.guardar_historial")
+    def guardar_historial(self, filas):
+        self.escritor.encolar(self._escribir_historial, filas)
+    
+    @trazado("bd.escribir_historial")
+    def _escribir_historial(self, filas):
+        with self.pool.transaccion() as conn:
+            conn.executemany(SQL_INSERTAR_HISTORIAL, filas)
+    
+    @trazado("bd.guardar_meta")
+    def guardar_meta(self, meta, tipo, prioridad=0.5):
+        self.escritor.encolar(self._escribir_meta, (
+            meta, tipo, prioridad, 0.0, "activa", datetime.now().isoformat()
+        ))
+    
+    @trazado("bd.escribir_meta")
+    def _escribir_meta(self, fila):
+        with self.pool.transaccion() as conn:
+            conn.execute(SQL_INSERTAR_META, fila)
+    
+    @trazado("bd.actualizar_metas")
+    def actualizar_metas(self, filas):
+        """filas: (progreso, estado, completada_en, meta); se escriben en una sola transacción"""
+        self.escritor.encolar(self._escribir_metas, filas)
+    
+    @trazado("bd.escribir_metas")
+    def _escribir_metas(self, filas):
+        with self.pool.transaccion() as conn:
+            conn.executemany(SQL_ACTUALIZAR_META, filas)
+    
+    def obtener_metas_registradas(self):
+        self.escritor.flush()
+        with self.pool.lectura() as conn:
+            return {fila[0] for fila in conn.execute(SQL_METAS_REGISTRADAS)}
+    
+    @trazado("bd.obtener_metas_activas")
+    def obtener_metas_activas(self):
+        self.escritor.flush()
+        with self.pool.lectura() as conn:
+            filas = conn.execute(SQL_METAS_ACTIVAS, ("activa",)).fetchall()
+        
+        metas = []
+        for fila in filas:
+            metas.append({
+                "id": fila[0],
+                "meta": fila[1],
+                "tipo": fila[2],
+                "prioridad": fila[3],
+                "progreso": fila[4],
+                "creada_en": fila[5]
+            })
+        
+        return metas
+    
+    @trazado("bd.crear_snapshot")
+    def crear_snapshot(self, estado, efectividad_previa, cambios_patrones=None, estable=True, al_fallar=None):
+        """Guarda el estado por secciones comprimidas; los patrones se guardan como delta
+        contra el snapshot anterior cuando se conoce el conjunto de cambios.
+        al_fallar() se llama desde el escritor si el snapshot no llega a disco"""
+        with self._lock_snapshot:
+            return self._crear_snapshot(estado, efectividad_previa, cambios_patrones, estable, al_fallar)
+    
+    def _crear_snapshot(self, estado, efectividad_previa, cambios_patrones, estable, al_fallar):
+        conocimiento = estado["conocimiento"]
+        patrones = conocimiento.get("patrones_aprendidos", {})
+        
+        secciones = {}
+        nuevas = []
+        
+        for nombre, contenido in (
+            ("neuronas", estado["neuronas"]),
+            ("sistema", {
+                "energia_sistema": estado["energia_sistema"],
+                "evoluciones": estado["evoluciones"],
+                "conocimiento": {k: v for k, v in conocimiento.items() if k != "patrones_aprendidos"}
+            })
+        ):
+            hash_seccion, blob = _codificar_seccion({"completo": contenido})
+            secciones[nombre] = hash_seccion
+            nuevas.append((hash_seccion, None, 0, blob))
+        
+        with self._lock_secciones:
+            anterior = self._ultima_seccion_patrones
+        base = None  # Sección de patrones que ya debe estar en disco
+        if anterior and cambios_patrones is not None and not cambios_patrones:
+            # Patrones sin cambios: se reutiliza la sección anterior tal cual
+            secciones["patrones"], profundidad = anterior
+            base = anterior[0]
+        elif anterior and cambios_patrones is not None and anterior[1] < MAX_PROFUNDIDAD_DELTA:
+            actuales = {p: patrones.get(p) for p in cambios_patrones}
+            delta = {
+                "base": anterior[0],
+                "cambios": {p: datos for p, datos in actuales.items() if datos is not None},
+                "eliminados": sorted(p for p, datos in actuales.items() if datos is None)
+            }
+            hash_seccion, blob = _codificar_seccion(delta)
+            profundidad = anterior[1] + 1
+            base = anterior[0]
+            secciones["patrones"] = hash_seccion
+            nuevas.append((hash_seccion, anterior[0], profundidad, blob))
+        else:
+            hash_seccion, blob = _codificar_seccion({"completo": dict(patrones.items())})
+            profundidad = 0
+            secciones["patrones"] = hash_seccion
+            nuevas.append((hash_seccion, None, profundidad, blob))
+        
+        manifiesto = json.dumps({"formato": FORMATO_SNAPSHOT, "secciones": secciones}, sort_keys=True)
+        hash_integridad = hashlib.sha256(manifiesto.encode("utf-8")).hexdigest()
+        
+        # Se fija antes de encolar: si la escritura falla, el escritor sólo la borra si sigue
+        # siendo la de este snapshot (con durabilidad síncrona falla antes de volver de encolar)
+        seccion = (secciones["patrones"], profundidad)
+        with self._lock_secciones:
+            self._ultima_seccion_patrones = seccion
+        
+        # La serialización es síncrona (estado consistente); la escritura va al escritor diferido
+        self.escritor.encolar(
+            self._escribir_snapshot, nuevas, hash_integridad, manifiesto,
+            estado.get("timestamp", datetime.now().isoformat()), efectividad_previa, estable,
+            seccion, base, al_fallar
+        )
+        
+        self._snapshots_sin_compactar += 1
+        if self._snapshots_sin_compactar >= COMPACTAR_CADA:
+            self.compactar_snapshots()
+        return hash_integridad
+    
+    def compactar_snapshots(self, esperar=False):
+        """Aplica la política de retención en el hilo escritor, detrás de lo ya encolado"""
+        self._snapshots_sin_compactar = 0
+        # Los snapshots que se creen después encadenan sus deltas sobre esta sección
+        with self._lock_secciones:
+            raiz = self._ultima_seccion_patrones[0] if self._ultima_seccion_patrones else None
+        self.escritor.encolar(self._compactar_snapshots, raiz)
+        if esperar:
+            self.escritor.flush()
+    
+    @trazado("bd.compactar_snapshots")
+    def _compactar_snapshots(self, raiz=None):
+        """Borra los snapshots fuera de la política y las secciones que ya no alcanza ninguna
+        cadena de deltas de los que quedan; devuelve (snapshots, secciones) borrados"""
+        with self.pool.transaccion() as conn:
+            snapshots = conn.execute(SQL_LISTAR_SNAPSHOTS).fetchall()
+            conservar = self.retencion.seleccionar(snapshots)
+            conservar.update(fila[0] for fila in conn.execute(SQL_SNAPSHOTS_INDEXADOS))
+            borrados = [(snapshot_id,) for snapshot_id, _ in snapshots if snapshot_id not in conservar]
+            conn.executemany(SQL_BORRAR_SNAPSHOT, borrados)
+            
+            raices = {raiz} if raiz else set()
+            for (datos,) in conn.execute(SQL_MANIFIESTOS):
+                manifiesto = json.loads(datos)
+                if manifiesto.get("formato") == FORMATO_SNAPSHOT:
+                    raices.update(manifiesto["secciones"].values())
+            
+            # Una sección sigue viva si alguna raíz llega a ella siguiendo la columna base
+            bases = dict(conn.execute(SQL_BASES_SECCIONES).fetchall())
+            vivas = set()
+            pendientes = list(raices)
+            while pendientes:
+                hash_seccion = pendientes.pop()
+                if hash_seccion in vivas or hash_seccion not in bases:
+                    continue
+                vivas.add(hash_seccion)
+                if bases[hash_seccion]:
+                    pendientes.append(bases[hash_seccion])
+            
+            huerfanas = [(hash_seccion,) for hash_seccion in bases if hash_seccion not in vivas]
+            conn.executemany(SQL_BORRAR_SECCION, huerfanas)
+        
+        return len(borrados), len(huerfanas)
+    
+    def claves_cambiadas_desde(self, snapshot_id):
+        """Patrones que pueden diferir entre un snapshot y el último creado por este proceso,
+        reunidos de la cadena de deltas entre ambos; None si la cadena no los une"""
+        self.escritor.flush()
+        with self._lock_secciones:
+            ultima = self._ultima_seccion_patrones
+        if ultima is None:
+            return None
+        
+        with self.pool.lectura() as conn:
+            fila = conn.execute(SQL_MANIFIESTO_SNAPSHOT, (snapshot_id,)).fetchone()
+            if fila is None:
+                return None
+            manifiesto = json.loads(fila[0])
+            if manifiesto.get("formato") != FORMATO_SNAPSHOT:
+                return None
+            
+            objetivo = manifiesto["secciones"]["patrones"]
+            hash_seccion = ultima[0]
+            claves = set()
+            while hash_seccion != objetivo:
+                fila = conn.execute(SQL_CARGAR_SECCION, (hash_seccion,)).fetchone()
+                if fila is None:
+                    return None
+                contenido = _decodificar_seccion(fila[1])
+                if "completo" in contenido:
+                    return None
+                claves.update(contenido["cambios"])
+                claves.update(contenido["eliminados"])
+                hash_seccion = fila[0]
+        return claves
+    
+    @trazado("bd.escribir_snapshot")
+    def _escribir_snapshot(self, nuevas, hash_integridad, manifiesto, timestamp, efectividad_previa, estable,
+                           seccion, base=None, al_fallar=None):
+        try:
+            with self._lock_secciones:
+                base_fallida = base in self._secciones_fallidas
+            if base_fallida:
+                # Encadenado sobre un snapshot que no llegó a disco: tampoco se puede escribir
+                raise KeyError(f"Sección de snapshot inexistente: {base}")
+            self._insertar_snapshot(nuevas, hash_integridad, manifiesto, timestamp, efectividad_previa, estable)
+        except Exception:
+            # Sin la sección base en disco el próximo snapshot no puede ser un delta; si entretanto
+            # se creó otro encima, fallará aquí mismo y será él quien la borre
+            with self._lock_secciones:
+                self._secciones_fallidas.add(seccion[0])
+                if self._ultima_seccion_patrones == seccion:
+                    self._ultima_seccion_patrones = None
+            if al_fallar is not None:
+                al_fallar()
+            raise
+        
+        with self._lock_secciones:
+            self._secciones_fallidas.difference_update(fila[0] for fila in nuevas)
+    
+    def _insertar_snapshot(self, nuevas, hash_integridad, manifiesto, timestamp, efectividad_previa, estable):
+        with self.pool.transaccion() as conn:
+            conn.executemany(SQL_INSERTAR_SECCION, nuevas)
+            
+            existente = conn.execute(SQL_SNAPSHOT_POR_HASH, (hash_integridad,)).fetchone()
+            if existente:
+                snapshot_id = existente[0]
+            else:
+                snapshot_id = conn.execute(SQL_INSERTAR_SNAPSHOT, (
+                    timestamp, hash_integridad, manifiesto, efectividad_previa, 1 if estable else 0
+                )).lastrowid
+            
+            if estable:
+                conn.execute(SQL_ACTUALIZAR_INDICE, ("ultimo_estable", snapshot_id))
+    
+    @trazado("bd.obtener_ultimo_snapshot_estable")
+    def obtener_ultimo_snapshot_estable(self, incluir_datos=True):
+        """Búsqueda O(1) a través del índice snapshot_indice"""
+        self.escritor.flush()
+        with self.pool.lectura() as conn:
+            fila = conn.execute(SQL_LEER_INDICE, ("ultimo_estable",)).fetchone()
+        
+        if not fila:
+            return None
+        return self.obtener_snapshot_por_id(fila[0], incluir_datos)
+    
+    @trazado("bd.obtener_snapshot_por_id")
+    def obtener_snapshot_por_id(self, snapshot_id, incluir_datos=True):
+        self.escritor.flush()
+        with self.pool.lectura() as conn:
+            resultado = conn.execute(SQL_SNAPSHOT_POR_ID, (snapshot_id,)).fetchone()
+            if not resultado:
+                return None
+            
+            snapshot = {
+                "id": resultado[0],
+                "timestamp": resultado[1],
+                "efectividad_previa": resultado[3],
+                "hash": resultado[4]
+            }
+            if incluir_datos:
+                snapshot["datos"] = self._reconstruir_estado(conn, json.loads(resultado[2]), resultado[1])
+        
+        return snapshot
+    
+    def _reconstruir_estado(self, conn, manifiesto, timestamp):
+        if manifiesto.get("formato") != FORMATO_SNAPSHOT:
+            # Snapshot antiguo: el estado completo está guardado en JSON plano
+            return manifiesto
+        
+        secciones = manifiesto["secciones"]
+        sistema = self._cargar_seccion(conn, secciones["sistema"])
+        conocimiento = dict(sistema["conocimiento"])
+        conocimiento["patrones_aprendidos"] = self._cargar_seccion(conn, secciones["patrones"])
+        
+        return {
+            "neuronas": self._cargar_seccion(conn, secciones["neuronas"]),
+            "conocimiento": conocimiento,
+            "energia_sistema": sistema["energia_sistema"],
+            "evoluciones": sistema["evoluciones"],
+            "timestamp": timestamp
+        }
+    
+    def _cargar_seccion(self, conn, hash_seccion):
+        """Recorre la cadena de deltas hasta la sección completa y los aplica en orden"""
+        deltas = []
+        while True:
+            fila = conn.execute(SQL_CARGAR_SECCION, (hash_seccion,)).fetchone()
+            if fila is None:
+                raise KeyError(f"Sección de snapshot inexistente: {hash_seccion}")
+            
+            contenido = _decodificar_seccion(fila[1])
+            if "completo" in contenido:
+                break
+            deltas.append(contenido)
+            hash_seccion = fila[0]
+        
+        resultado = contenido["completo"]
+        for delta in reversed(deltas):
+            resultado.update(delta["cambios"])
+            for patron in delta["eliminados"]:
+                resultado.pop(patron, None)
+        return resultado
@@ -0,0 +1,115 @@
+"""Snapshots y rollback automático del cerebro"""
+
+from datetime import datetime
+
+# ===== SISTEMA DE ROLLBACK AUTOMÁTICO =====
+CAMPOS_NEURONA = ("eficiencia", "experiencia", "habilidades_aprendidas", "umbral_activacion")
+
+class SistemaRollback:
+    def __init__(self, cerebro):
+        self.cerebro = cerebro
+        self.ultimo_estado_stable = None
+        self.alertas_activas = []
+    
+    def _calcular_efectividad_promedio(self):
+        """Calcula efectividad promedio de últimas consultas"""
+        return self.cerebro.historial.media_movil(5)
+    
+    def crear_punto_restauracion(self):
+        """Crea snapshot antes de modificaciones riesgosas"""
+        efectividad_actual = self._calcular_efectividad_promedio()
+        
+        # El conocimiento no puede cambiar mientras se serializa
+        with self.cerebro.sistema_aprendizaje.lock:
+            estado_actual = self._capturar_estado_completo()
+            cambios = self.cerebro.sistema_aprendizaje.consumir_cambios_snapshot()
+            hash_snapshot = self.cerebro.base_datos.crear_snapshot(
+                estado_actual, efectividad_actual, cambios,
+                al_fallar=self.cerebro.sistema_aprendizaje.invalidar_cambios_snapshot
+            )
+        return hash_snapshot
+    
+    def _capturar_estado_completo(self):
+        """Captura estado completo del sistema"""
+        estado = {
+            "neuronas": [],
+            "conocimiento": self.cerebro.sistema_aprendizaje.conocimiento,
+            "energia_sistema": self.cerebro.energia_sistema,
+            "evoluciones": self.cerebro.evoluciones,
+            "timestamp": datetime.now().isoformat()
+        }
+        
+        for neurona in self.cerebro.neuronas:
+            with neurona._lock:
+                estado["neuronas"].append({
+                    "nombre": neurona.nombre,
+                    "especialidad": neurona.especialidad,
+                    "eficiencia": neurona.eficiencia,
+                    "experiencia": neurona.experiencia,
+                    "habilidades_aprendidas": neurona.habilidades_aprendidas.copy(),
+                    "umbral_activacion": neurona.umbral_activacion
+                })
+        
+        return estado
+    
+    def evaluar_estabilidad(self, efectividad_nueva):
+        """Evalúa si se necesita rollback automático"""
+        snapshot = self.cerebro.base_datos.obtener_ultimo_snapshot_estable(incluir_datos=False)
+        
+        if not snapshot:
+            return "continuar"
+        
+        efectividad_previa = snapshot["efectividad_previa"]
+        diferencia = efectividad_previa - efectividad_nueva
+        
+        if diferencia > 0.3:
+            self.alertas_activas.append(f"🚨 Caída crítica: {diferencia:.1%}")
+            return "rollback_automatico"
+        elif diferencia > 0.15:
+            self.alertas_activas.append(f"⚠️ Degradación: {diferencia:.1%}")
+            return "notificar_usuario"
+        else:
+            return "continuar"
+    
+    def ejecutar_rollback(self, snapshot_id=None):
+        """Ejecuta rollback a snapshot específico o al último estable; el mensaje para
+        el usuario queda en alertas_activas (la interfaz decide cómo mostrarlo)"""
+        if not snapshot_id:
+            snapshot = self.cerebro.base_datos.obtener_ultimo_snapshot_estable()
+        else:
+            snapshot = self._obtener_snapshot_por_id(snapshot_id)
+        
+        if not snapshot:
+            self.alertas_activas.append("❌ No hay snapshot disponible para rollback")
+            return False
+        
+        estado = snapshot["datos"]
+        
+        # Sólo se tocan los campos de neurona que difieren del snapshot
+        for neurona, datos_neurona in zip(self.cerebro.neuronas, estado["neuronas"]):
+            with neurona._lock:
+                for campo in CAMPOS_NEURONA:
+                    if getattr(neurona, campo) != datos_neurona[campo]:
+                        valor = datos_neurona[campo]
+                        setattr(neurona, campo, valor.copy() if isinstance(valor, list) else valor)
+        
+        # Los patrones se restauran por diferencias: candidatos de la cadena de deltas posterior
+        candidatos = self.cerebro.base_datos.claves_cambiadas_desde(snapshot["id"])
+        actualizados, eliminados = self.cerebro.sistema_aprendizaje.restaurar_diferencias(
+            estado["conocimiento"], candidatos
+        )
+        
+        with self.cerebro.lock_estado:
+            self.cerebro.energia_sistema = estado["energia_sistema"]
+            self.cerebro.evoluciones = estado["evoluciones"]
+            self.cerebro.invalidar_cache()
+        
+        self.alertas_activas.append(
+            f"✅ Rollback completado a {snapshot['timestamp'][:16]} "
+            f"({actualizados} patrones restaurados, {eliminados} eliminados)"
+        )
+        return True
+
+    def _obtener_snapshot_por_id(self, snapshot_id):
+        """Obtiene snapshot por ID"""
+        return self.cerebro.base_datos.obtener_snapshot_por_id(snapshot_id)
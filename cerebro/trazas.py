@@ -0,0 +1,151 @@
+"""Tramos de instrumentación agregados en histogramas de cubetas fijas"""
+
+import os
+import threading
+import functools
+from bisect import bisect_left
+from time import perf_counter
+
+# ===== TRAZAS DEL CAMINO CALIENTE =====
+TRAZAS_ACTIVAS = os.environ.get("CEREBRO_TRAZAS", "0") == "1"
+
+# Límites superiores de las cubetas en segundos (escala logarítmica de 50 µs a 10 s)
+LIMITES_CUBETAS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 10.0
+)
+
+class Histograma:
+    """Conteos por cubeta más suma y máximo: observar es O(log cubetas) y sin asignaciones"""
+    __slots__ = ("conteos", "suma", "maximo", "total")
+    
+    def __init__(self):
+        self.conteos = [0] * (len(LIMITES_CUBETAS) + 1)  # La última cubeta es +Inf
+        self.suma = 0.0
+        self.maximo = 0.0
+        self.total = 0
+    
+    def observar(self, segundos):
+        self.conteos[bisect_left(LIMITES_CUBETAS, segundos)] += 1
+        self.suma += segundos
+        self.total += 1
+        if segundos > self.maximo:
+            self.maximo = segundos
+    
+    def percentil(self, p):
+        """Estimación por interpolación lineal dentro de la cubeta que contiene el percentil"""
+        if not self.total:
+            return 0.0
+        
+        objetivo = p / 100 * self.total
+        acumulado = 0
+        for i, conteo in enumerate(self.conteos):
+            if acumulado + conteo >= objetivo and conteo:
+                inferior = LIMITES_CUBETAS[i - 1] if i else 0.0
+                superior = LIMITES_CUBETAS[i] if i < len(LIMITES_CUBETAS) else self.maximo
+                return min(self.maximo, inferior + (superior - inferior) * (objetivo - acumulado) / conteo)
+            acumulado += conteo
+        return self.maximo
+    
+    def resumen(self):
+        return {
+            "conteo": self.total,
+            "media_ms": self.suma / self.total * 1000 if self.total else 0.0,
+            "p50_ms": self.percentil(50) * 1000,
+            "p99_ms": self.percentil(99) * 1000,
+            "max_ms": self.maximo * 1000,
+            "cubetas": {
+                str(limite): conteo for limite, conteo in zip(LIMITES_CUBETAS + ("+Inf",), self.conteos)
+            }
+        }
+
+class TramoNulo:
+    """Tramo compartido cuando las trazas están desactivadas: no mide nada"""
+    __slots__ = ()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        return False
+
+TRAMO_NULO = TramoNulo()
+
+class Tramo:
+    __slots__ = ("trazador", "nombre", "inicio")
+    
+    def __init__(self, trazador, nombre):
+        self.trazador = trazador
+        self.nombre = nombre
+    
+    def __enter__(self):
+        self.inicio = perf_counter()
+        return self
+    
+    def __exit__(self, *exc):
+        self.trazador.observar(self.nombre, perf_counter() - self.inicio)
+        return False
+
+class Trazador:
+    def __init__(self, activo=TRAZAS_ACTIVAS):
+        self.activo = activo
+        self.histogramas = {}
+        self._lock = threading.Lock()
+    
+    def tramo(self, nombre):
+        """Context manager; con las trazas desactivadas devuelve el tramo nulo compartido"""
+        if not self.activo:
+            return TRAMO_NULO
+        return Tramo(self, nombre)
+    
+    def observar(self, nombre, segundos):
+        with self._lock:
+            histograma = self.histogramas.get(nombre)
+            if histograma is None:
+                histograma = self.histogramas[nombre] = Histograma()
+            histograma.observar(segundos)
+    
+    def reiniciar(self):
+        with self._lock:
+            self.histogramas = {}
+    
+    def exportar_json(self):
+        with self._lock:
+            return {nombre: h.resumen() for nombre, h in sorted(self.histogramas.items())}
+    
+    def exportar_prometheus(self):
+        """Formato de exposición de texto de Prometheus (cubetas acumuladas, en segundos)"""
+        metrica = "cerebro_tramo_duracion_segundos"
+        lineas = [
+            f"# HELP {metrica} Duración de los tramos instrumentados del cerebro",
+            f"# TYPE {metrica} histogram"
+        ]
+        
+        with self._lock:
+            for nombre, histograma in sorted(self.histogramas.items()):
+                acumulado = 0
+                for limite, conteo in zip(LIMITES_CUBETAS + ("+Inf",), histograma.conteos):
+                    acumulado += conteo
+                    lineas.append(f'{metrica}_bucket{{tramo="{nombre}",le="{limite}"}} {acumulado}')
+                lineas.append(f'{metrica}_sum{{tramo="{nombre}"}} {histograma.suma}')
+                lineas.append(f'{metrica}_count{{tramo="{nombre}"}} {histograma.total}')
+        
+        return "\n".join(lineas) + "\n"
+
+TRAZADOR = Trazador()
+
+def trazado(nombre):
+    """Decorador de tramo: desactivado, el coste es una comprobación de atributo por llamada"""
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            if not TRAZADOR.activo:
+                return funcion(*args, **kwargs)
+            
+            inicio = perf_counter()
+            try:
+                return funcion(*args, **kwargs)
+            finally:
+                TRAZADOR.observar(nombre, perf_counter() - inicio)
+        return envoltura
+    return decorador